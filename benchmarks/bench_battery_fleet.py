@@ -0,0 +1,68 @@
+"""Benchmark of stepping batteries with pysimmods, one BatteryFleet call per
+battery and one vectorized BatteryFleet call for all batteries.
+
+Usage: python -m benchmarks.bench_battery_fleet [n_batteries] [n_steps]
+"""
+import random
+import sys
+import time
+
+from pysimmods.buffer.batterysim.battery import Battery
+
+from hackathon_backend.units.fleet import BatteryFleet
+
+PARAMS = {
+    "cap_kwh": 12,
+    "p_charge_max_kw": 2,
+    "p_discharge_max_kw": 2,
+    "soc_min_percent": 0,
+    "eta_pc": [0, 0, 100],
+}
+
+
+def bench(n_batteries, n_steps, seed=42):
+    rng = random.Random(seed)
+    setpoints = [
+        [rng.uniform(-3, 3) for _ in range(n_batteries)] for _ in range(n_steps)
+    ]
+
+    batteries = [Battery(PARAMS, {"soc_percent": 50}) for _ in range(n_batteries)]
+    start = time.perf_counter()
+    for step_setpoints in setpoints:
+        for battery, setpoint in zip(batteries, step_setpoints):
+            battery.set_p_kw(setpoint)
+            battery.set_step_size(15 * 60)
+            battery.step()
+    pysimmods_s = time.perf_counter() - start
+
+    fleet = BatteryFleet()
+    indices = [fleet.add(soc_percent=50, **PARAMS) for _ in range(n_batteries)]
+    start = time.perf_counter()
+    for step_setpoints in setpoints:
+        for index, setpoint in zip(indices, step_setpoints):
+            fleet.step_battery(index, setpoint, 15 * 60)
+    scalar_s = time.perf_counter() - start
+
+    fleet = BatteryFleet()
+    indices = [fleet.add(soc_percent=50, **PARAMS) for _ in range(n_batteries)]
+    start = time.perf_counter()
+    for step_setpoints in setpoints:
+        fleet.step(indices, step_setpoints, 15 * 60)
+    vectorized_s = time.perf_counter() - start
+
+    return pysimmods_s / n_steps, scalar_s / n_steps, vectorized_s / n_steps
+
+
+def main(n_batteries, n_steps):
+    pysimmods_s, scalar_s, vectorized_s = bench(n_batteries, n_steps)
+    print(f"batteries:       {n_batteries}")
+    print(f"pysimmods:       {pysimmods_s * 1e3:.2f} ms/step")
+    print(f"fleet (scalar):  {scalar_s * 1e3:.2f} ms/step")
+    print(f"fleet (vector):  {vectorized_s * 1e3:.2f} ms/step")
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 10_000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 10,
+    )
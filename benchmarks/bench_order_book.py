@@ -0,0 +1,70 @@
+"""Benchmark of order placement and clearing of an ElectricityAskAuction.
+
+Usage: python -m benchmarks.bench_order_book [n_orders ...]
+"""
+import random
+import sys
+import time
+
+from hackathon_backend.market.auction import AuctionParameters, ElectricityAskAuction
+
+DEFAULT_ORDER_COUNTS = [10_000, 100_000, 1_000_000]
+
+
+def create_auction(tender_amount_kw):
+    return ElectricityAskAuction(
+        AuctionParameters(
+            product_type="electricity",
+            gate_opening_time=0,
+            gate_closure_time=10,
+            supply_start_time=20,
+            supply_duration_s=10,
+            tender_amount_kw=tender_amount_kw,
+        ),
+        current_time=0,
+    )
+
+
+def bench(n_orders, seed=42):
+    rng = random.Random(seed)
+    # prices with a resolution of 0.1 ct, amounts between 1 and 5 kW
+    orders = [
+        ([rng.uniform(1, 5)], round(rng.uniform(0, 100), 1), [f"agent{i % 1000}"])
+        for i in range(n_orders)
+    ]
+    # roughly half of the offered amount will be awarded
+    auction = create_auction(tender_amount_kw=1.5 * n_orders)
+
+    start = time.perf_counter()
+    for amount_kw, price_ct, agents in orders:
+        auction.place_order(amount_kw, price_ct, agents)
+    place_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    result = auction.clear()
+    clear_s = time.perf_counter() - start
+
+    # clearing latency with a typical tender of some kW
+    auction.params.tender_amount_kw = 100
+    start = time.perf_counter()
+    auction.clear()
+    clear_small_s = time.perf_counter() - start
+
+    return place_s, clear_s, len(result.awarded_orders), clear_small_s
+
+
+def main(order_counts):
+    print(
+        f"{'orders':>10} {'place [s]':>10} {'us/order':>9} {'clear [s]':>10} "
+        f"{'awarded':>9} {'clear 100 kW [s]':>17}"
+    )
+    for n_orders in order_counts:
+        place_s, clear_s, n_awarded, clear_small_s = bench(n_orders)
+        print(
+            f"{n_orders:>10} {place_s:>10.3f} {place_s / n_orders * 1e6:>9.2f} "
+            f"{clear_s:>10.3f} {n_awarded:>9} {clear_small_s:>17.4f}"
+        )
+
+
+if __name__ == "__main__":
+    main([int(n) for n in sys.argv[1:]] or DEFAULT_ORDER_COUNTS)
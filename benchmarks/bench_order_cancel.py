@@ -0,0 +1,50 @@
+"""Benchmark of cancelling and amending orders of an ElectricityAskAuction,
+in which all orders are placed at the same price (e.g. the price cap).
+
+Usage: python -m benchmarks.bench_order_cancel [n_orders ...]
+"""
+import random
+import sys
+import time
+
+from benchmarks.bench_order_book import create_auction
+
+DEFAULT_ORDER_COUNTS = [10_000, 100_000]
+
+
+def bench(n_orders, seed=42):
+    rng = random.Random(seed)
+    auction = create_auction(tender_amount_kw=n_orders)
+    price_ct = auction.params.maximum_price_ct
+    order_ids = [
+        auction.place_order([1.0], price_ct, [f"agent{i % 1000}"])
+        for i in range(n_orders)
+    ]
+    rng.shuffle(order_ids)
+    amended_ids = order_ids[: n_orders // 2]
+    cancelled_ids = order_ids[n_orders // 2 :]
+
+    start = time.perf_counter()
+    for order_id in amended_ids:
+        auction.amend_order(order_id, amount_kw=[2.0])
+    amend_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for order_id in cancelled_ids:
+        auction.cancel_order(order_id)
+    cancel_s = time.perf_counter() - start
+
+    return amend_s / len(amended_ids), cancel_s / len(cancelled_ids)
+
+
+def main(order_counts):
+    for n_orders in order_counts:
+        amend_s, cancel_s = bench(n_orders)
+        print(
+            f"{n_orders:>9} orders at one price: amend {amend_s * 1e6:.2f} us, "
+            f"cancel {cancel_s * 1e6:.2f} us"
+        )
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or DEFAULT_ORDER_COUNTS)
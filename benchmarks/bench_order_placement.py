@@ -0,0 +1,45 @@
+"""Benchmark of the latency and memory allocation of placing orders in an
+ElectricityAskAuction.
+
+Usage: python -m benchmarks.bench_order_placement [n_orders]
+"""
+import random
+import sys
+import time
+import tracemalloc
+
+from benchmarks.bench_order_book import create_auction
+
+
+def bench(n_orders, seed=42):
+    rng = random.Random(seed)
+    orders = [
+        ([rng.uniform(1, 5)], round(rng.uniform(0, 100), 1), [f"agent{i % 1000}"])
+        for i in range(n_orders)
+    ]
+
+    auction = create_auction(tender_amount_kw=n_orders)
+    start = time.perf_counter()
+    for amount_kw, price_ct, agents in orders:
+        auction.place_order(amount_kw, price_ct, agents)
+    place_s = time.perf_counter() - start
+
+    auction = create_auction(tender_amount_kw=n_orders)
+    tracemalloc.start()
+    for amount_kw, price_ct, agents in orders:
+        auction.place_order(amount_kw, price_ct, agents)
+    allocated_bytes, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return place_s, allocated_bytes
+
+
+def main(n_orders):
+    place_s, allocated_bytes = bench(n_orders)
+    print(f"orders:          {n_orders}")
+    print(f"latency:         {place_s / n_orders * 1e6:.2f} us/order")
+    print(f"allocated:       {allocated_bytes / n_orders:.0f} bytes/order")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
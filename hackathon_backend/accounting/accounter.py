@@ -11,67 +11,74 @@ AGENTS = "Agents providing the kW"
 class ElectricityAskAuctionAccounter:
     def __init__(self, auction_result: AuctionResult):
         self.result = auction_result
-        if auction_result is not None:
-            self.awarded_orders = self._generate_agent_dataframes()
+        # agent -> dataframe of its awarded orders, created on first access
+        self.awarded_orders = {}
 
-    def _generate_agent_dataframes(self, ascending=True):
-        agent_dataframes = {}
-        for awarded_order in self.result.awarded_orders:
-            agents = awarded_order.agents
-            for i, agent in enumerate(agents):
-                if agent not in agent_dataframes:
-                    agent_dataframes[agent] = pd.DataFrame(columns=[AMOUNT, PRICE])
-
-                agent_dataframes[agent] = pd.concat(
-                    [
-                        agent_dataframes[agent],
-                        pd.DataFrame(
-                            [
-                                {
-                                    AMOUNT: awarded_order.awarded_amount_kw[i],
-                                    TOTAL_AMOUNT: sum(awarded_order.awarded_amount_kw),
-                                    AGENTS: set(agents),
-                                    PRICE: awarded_order.price_ct,
-                                }
-                            ]
-                        ),
-                    ],
-                    ignore_index=True,
+    def _get_agent_dataframe(self, agent, ascending=True):
+        if self.result is None:
+            return None
+        if agent not in self.awarded_orders:
+            if not self.awarded_orders:
+                self._check_award_agents()
+            agent_awards = self.result.get_agent_awards(agent)
+            if len(agent_awards) == 0:
+                self.awarded_orders[agent] = None
+            else:
+                self.awarded_orders[agent] = (
+                    pd.DataFrame(
+                        [
+                            {
+                                AMOUNT: awarded_order.awarded_amount_kw[i],
+                                PRICE: awarded_order.price_ct,
+                                TOTAL_AMOUNT: sum(awarded_order.awarded_amount_kw),
+                                AGENTS: set(awarded_order.agents),
+                            }
+                            for awarded_order, i in agent_awards
+                        ]
+                    )
+                    .sort_values(by=PRICE, ascending=ascending)
+                    .reset_index(drop=True)
                 )
+        return self.awarded_orders[agent]
 
-        for agent in agent_dataframes:
-            agent_dataframes[agent] = (
-                agent_dataframes[agent]
-                .sort_values(by=PRICE, ascending=ascending)
-                .reset_index(drop=True)
-            )
-        return agent_dataframes
+    def _check_award_agents(self):
+        # like building all frames at once, reject results with invalid agents
+        for awarded_order in self.result.awarded_orders:
+            for agent in awarded_order.agents:
+                if not isinstance(agent, str):
+                    raise TypeError(
+                        f"Agents of awarded orders must be strings, got {agent!r}!"
+                    )
 
     def return_awarded_sum(self, agent):
-        if self.result is None or agent not in self.awarded_orders:
+        agent_dataframe = self._get_agent_dataframe(agent)
+        if agent_dataframe is None:
             return 0
 
-        return self.awarded_orders[agent][AMOUNT].sum()
+        return agent_dataframe[AMOUNT].sum()
 
     def return_awarded(self, agent):
-        if self.result is None or agent not in self.awarded_orders:
+        agent_dataframe = self._get_agent_dataframe(agent)
+        if agent_dataframe is None:
             return []
 
-        return self.awarded_orders[agent][AMOUNT]
+        return agent_dataframe[AMOUNT]
 
     def return_awarded_agents(self, agent):
-        if self.result is None or agent not in self.awarded_orders:
+        agent_dataframe = self._get_agent_dataframe(agent)
+        if agent_dataframe is None:
             return []
 
-        return self.awarded_orders[agent][AGENTS]
+        return agent_dataframe[AGENTS]
 
     def calculate_payoff(self, agent, total_provided_amount):
-        if self.result is None or agent not in self.awarded_orders:
+        agent_dataframe = self._get_agent_dataframe(agent)
+        if agent_dataframe is None:
             return 0
-        
+
         awarded_amount_added_up = 0
         payoff = 0
-        for _, row in self.awarded_orders[agent].iterrows():
+        for _, row in agent_dataframe.iterrows():
             order_provided_amount = max(min(row[AMOUNT], total_provided_amount - awarded_amount_added_up), 0)
             payoff += row[PRICE] * order_provided_amount
             payoff -= row[PRICE] * (row[AMOUNT] - order_provided_amount)
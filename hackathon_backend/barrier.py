@@ -0,0 +1,32 @@
+import asyncio
+from typing import Iterable
+
+
+class ReadyBarrier:
+    """Tracks which actors are ready during a step, so the step can end
+    before its deadline once all actors are ready."""
+
+    def __init__(self) -> None:
+        self.actors = frozenset()
+        self.ready = set()
+        self._event = None
+
+    def begin(self, actors: Iterable[str]):
+        """Start a new step, in which all given actors have to be ready."""
+        self.actors = frozenset(actors)
+        self.ready = set()
+        self._event = asyncio.Event()
+
+    def mark_ready(self, actors: Iterable[str]):
+        if self._event is None:
+            return
+        self.ready.update(actor for actor in actors if actor in self.actors)
+        if self.actors and self.ready >= self.actors:
+            self._event.set()
+
+    @property
+    def is_ready(self):
+        return self._event is not None and self._event.is_set()
+
+    async def wait(self):
+        await self._event.wait()
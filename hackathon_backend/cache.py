@@ -0,0 +1,45 @@
+import json
+from typing import Any, Callable, Dict, Hashable
+from fastapi.encoders import jsonable_encoder
+
+
+def encode_json(payload: Any) -> bytes:
+    """Encode a payload like the default JSONResponse of FastAPI."""
+    return json.dumps(
+        jsonable_encoder(payload),
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+class ResponseCache:
+    """Cache for serialized responses. All entries belong to one version of
+    the underlying data, when a different version is requested the cache is
+    invalidated, so every payload is serialized once per version.
+
+    At most max_entries entries are kept, the least recently used entry is
+    evicted first."""
+
+    def __init__(self, max_entries=1_000) -> None:
+        self.version = None
+        self.max_entries = max_entries
+        # in the order of their last use, least recently used first
+        self._entries: Dict[Hashable, bytes] = {}
+
+    def get(self, key: Hashable, version: Hashable, build: Callable[[], Any]) -> bytes:
+        if version != self.version:
+            self._entries = {}
+            self.version = version
+        content = self._entries.pop(key, None)
+        if content is None:
+            content = encode_json(build())
+            while len(self._entries) >= self.max_entries:
+                del self._entries[next(iter(self._entries))]
+        self._entries[key] = content
+        return content
+
+    def invalidate(self):
+        self._entries = {}
+        self.version = None
@@ -0,0 +1,71 @@
+import asyncio
+import time
+
+
+class StepClock:
+    """Schedules real-time step boundaries as absolute deadlines on a
+    monotonic clock. Consecutive deadlines are computed from the previous
+    deadline, not from the time the step work finished, so the step
+    boundaries do not drift."""
+
+    def __init__(self, clock=time.monotonic) -> None:
+        self._clock = clock
+        self._deadline = None
+        self.paused = False
+
+    def now(self) -> float:
+        return self._clock()
+
+    def schedule_in(self, duration_s: float):
+        """Set the next deadline relative to now."""
+        self._deadline = self._clock() + duration_s
+
+    def schedule_next(self, duration_s: float):
+        """Set the next deadline relative to the last one. If the clock fell
+        behind by more than a step, the next step gets its full duration from
+        now instead of running the missed steps back to back."""
+        now = self._clock()
+        if self._deadline is None or self._deadline + duration_s <= now:
+            self._deadline = now + duration_s
+        else:
+            self._deadline += duration_s
+
+    def resync(self):
+        """Restart the schedule at now, e.g. after a pause."""
+        self._deadline = self._clock()
+
+    @property
+    def remaining_s(self) -> float:
+        """Seconds until the next deadline, -1 if paused."""
+        if self.paused:
+            return -1
+        if self._deadline is None:
+            return 0
+        return max(0.0, self._deadline - self._clock())
+
+    async def wait(self):
+        """Sleep until the next deadline."""
+        remaining_s = self.remaining_s
+        if remaining_s > 0:
+            await asyncio.sleep(remaining_s)
+
+
+class FastForwardClock(StepClock):
+    """Clock without real-time pacing, every deadline is due immediately.
+    Waiting only yields to the event loop, so the steps run back to back."""
+
+    def schedule_in(self, duration_s: float):
+        pass
+
+    def schedule_next(self, duration_s: float):
+        pass
+
+    def resync(self):
+        pass
+
+    @property
+    def remaining_s(self) -> float:
+        return -1 if self.paused else 0
+
+    async def wait(self):
+        await asyncio.sleep(0)
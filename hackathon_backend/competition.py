@@ -0,0 +1,123 @@
+import functools
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List
+from hackathon_backend.controller import Controller
+from hackathon_backend.persistence import JsonPersistenceHandler
+from hackathon_backend.score import CsvScoreHandler
+
+COMPETITION_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]+$")
+
+
+class Competition:
+    """A competition (league) with its own config, participants and state.
+    All state files are stored in the state directory of the competition."""
+
+    def __init__(
+        self,
+        competition_id: str,
+        config_file,
+        state_dir,
+        step_executor: ThreadPoolExecutor = None,
+    ) -> None:
+        self.id = competition_id
+        self.state_dir = Path(state_dir)
+        self.state_dir.mkdir(parents=True, exist_ok=True)
+        controller_factory = functools.partial(
+            Controller,
+            config_file,
+            step_executor=step_executor,
+            state_dir=self.state_dir,
+        )
+        self.persistence_handler = JsonPersistenceHandler(
+            self.state_dir / "app_state.json", controller_factory=controller_factory
+        )
+        self.score_handler = CsvScoreHandler(
+            time.time(), results_dir=self.state_dir / "results"
+        )
+        self.controller = self._add_hooks(controller_factory())
+
+    def _add_hooks(self, controller: Controller):
+        controller.add_after_step_hook(
+            self.persistence_handler.write_snapshot,
+            snapshot=self.persistence_handler.snapshot,
+        )
+        controller.add_after_step_hook(
+            self.score_handler.write_snapshot, snapshot=self.score_handler.snapshot
+        )
+        return controller
+
+    def load(self) -> Controller:
+        """Replace the controller by the persisted state."""
+        self.controller = self._add_hooks(self.persistence_handler.load())
+        return self.controller
+
+
+class CompetitionRegistry:
+    """Hosts several competitions in one process. Their step loops share the
+    event loop and one step thread, so the steps of all competitions are
+    executed one after another."""
+
+    def __init__(self, state_root="competitions") -> None:
+        self.state_root = Path(state_root)
+        self._competitions: Dict[str, Competition] = {}
+        self._step_executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="competition-step"
+        )
+        self._running = False
+
+    def create(self, competition_id: str, config_file) -> Competition:
+        if not COMPETITION_ID_PATTERN.match(competition_id):
+            raise ValueError(f"Invalid competition id {competition_id}!")
+        if competition_id in self._competitions:
+            raise ValueError(f"The competition {competition_id} already exists!")
+        competition = Competition(
+            competition_id,
+            config_file,
+            self.state_root / competition_id,
+            step_executor=self._step_executor,
+        )
+        self._competitions[competition_id] = competition
+        if self._running:
+            competition.controller.init()
+        return competition
+
+    def create_all(self, competitions: Dict[str, str]):
+        """Create the competitions (id -> config file) which do not exist yet."""
+        for competition_id, config_file in competitions.items():
+            if competition_id not in self._competitions:
+                self.create(competition_id, config_file)
+
+    def get(self, competition_id: str) -> Competition:
+        return self._competitions[competition_id]
+
+    def ids(self) -> List[str]:
+        return list(self._competitions.keys())
+
+    def load(self, competition_id: str) -> Controller:
+        """Replace the controller of the competition by its persisted state."""
+        competition = self.get(competition_id)
+        competition.controller.shutdown()
+        controller = competition.load()
+        if self._running:
+            controller.init()
+        return controller
+
+    def start(self):
+        self._running = True
+        for competition in self._competitions.values():
+            competition.controller.init()
+
+    def shutdown(self):
+        self._running = False
+        for competition in self._competitions.values():
+            competition.controller.shutdown()
+        self._step_executor.shutdown(wait=False)
+
+    def __contains__(self, competition_id):
+        return competition_id in self._competitions
+
+    def __len__(self):
+        return len(self._competitions)
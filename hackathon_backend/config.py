@@ -1,6 +1,8 @@
+import asyncio
 import json
+import os
 from pydantic import BaseModel
-from typing import List
+from typing import Callable, Dict, List, Literal, Optional
 
 
 DEFAULT_CONFIG_FILE = "config.json"
@@ -12,6 +14,24 @@ class Config(BaseModel):
     pause: bool
     max_steps: int
     test_mode: bool
+    max_expired_auctions: Optional[int] = None
+    auction_archive_file: str = "auction_archive.jsonl"
+    # per actor token bucket limits (requests per second, None disables)
+    read_rate_limit_per_s: Optional[float] = None
+    read_rate_limit_burst: float = 20
+    order_rate_limit_per_s: Optional[float] = None
+    order_rate_limit_burst: float = 20
+    # number of worker processes stepping the units (0 steps in-process)
+    unit_workers: int = 0
+    # end a step early once all actors are ready, signalled explicitly
+    # ("signal") or by placing orders ("orders"), None disables
+    ready_barrier: Optional[Literal["signal", "orders"]] = None
+    min_step_dwell_s: float = 0
+    # additional competitions hosted by this server, id -> config file
+    competitions: Dict[str, str] = {}
+    # token required by the admin endpoints (X-Admin-Token header), without
+    # a token they are only available from the local host
+    admin_token: Optional[str] = None
 
 
 def load_config(config_file) -> Config:
@@ -21,3 +41,53 @@ def load_config(config_file) -> Config:
 
 def load_default_config() -> Config:
     return load_config(DEFAULT_CONFIG_FILE)
+
+
+class ConfigProvider:
+    """Caches the parsed config of a config file. The file is only parsed
+    again if its mtime or size changed, or a config is pushed (e.g. by an
+    admin). Subscribers are called with the new config on every change.
+
+    A pushed config is kept until the file changes again."""
+
+    def __init__(self, config_file) -> None:
+        self._subscribers: List[Callable[[Config], None]] = []
+        self.config_file = config_file
+        self._stat = None
+        self.config = None
+        self.refresh()
+
+    @property
+    def config_file(self):
+        return self._config_file
+
+    @config_file.setter
+    def config_file(self, config_file):
+        self._config_file = config_file
+        # force a reload on the next refresh
+        self._stat = None
+
+    def subscribe(self, subscriber: Callable[[Config], None]):
+        self._subscribers.append(subscriber)
+
+    def get(self) -> Config:
+        return self.config
+
+    def refresh(self) -> Config:
+        """Reload the config if the file changed, blocking file I/O."""
+        stat = os.stat(self.config_file)
+        file_stat = (stat.st_mtime_ns, stat.st_size)
+        if file_stat != self._stat:
+            config = load_config(self.config_file)
+            self._stat = file_stat
+            self.push(config)
+        return self.config
+
+    async def refresh_async(self) -> Config:
+        """Reload the config if the file changed, without blocking the loop."""
+        return await asyncio.to_thread(self.refresh)
+
+    def push(self, config: Config):
+        self.config = config
+        for subscriber in self._subscribers:
+            subscriber(config)
@@ -1,13 +1,28 @@
 import asyncio
+import inspect
+import dataclasses
+import functools
+import itertools
+import threading
+from types import MappingProxyType
+from concurrent.futures import Future, ThreadPoolExecutor
 import traceback
 import logging
 import time, datetime
-from typing import List
+from pathlib import Path
+from typing import Callable, Dict, List
 import pandas as pd
 from pydantic.dataclasses import dataclass
 from .units.pool import UnitPool, allocate_default_actor_units
+from .units.workers import UnitWorkers
 from .units.unit import UnitInput
-from .market.market import Market, MarketInputs
+from .market.market import Market, MarketInputs, OrderAccessException
+from .market.archive import AuctionArchive
+from .cache import ResponseCache
+from .clock import StepClock
+from .barrier import ReadyBarrier
+from .pipeline import HookWorker
+from .snapshot import ControllerSnapshot, LazyMapping
 from .market.auction import initiate_electricity_ask_auction
 from hackathon_backend.units.pool import (
     UnitInformation,
@@ -19,9 +34,12 @@ from hackathon_backend.accounting.accounter import (
 )
 from hackathon_backend.accounting.account import Account
 from hackathon_backend.general_demand import create_general_demand
-from hackathon_backend.config import Config, load_config
+from hackathon_backend.config import Config, ConfigProvider
 
 SIMULATION_TIME_SECONDS_PER_STEP = 900
+# while paused, config pushes wake the loop at once, file edits are noticed
+# by checking the file at this interval
+CONFIG_FILE_CHECK_INTERVAL_S = 5
 
 logger = logging.getLogger(__name__)
 
@@ -34,6 +52,32 @@ class ControlException(Exception):
         self.message = message
 
 
+DEFAULT_STATE_DIR = "state"
+
+
+def create_market(
+    config: Config, archived_auctions=0, state_dir=DEFAULT_STATE_DIR
+) -> Market:
+    return Market(
+        max_expired_auctions=config.max_expired_auctions,
+        archive=AuctionArchive(
+            Path(state_dir) / config.auction_archive_file, size=archived_auctions
+        ),
+    )
+
+
+@dataclass
+class FastForwardReport:
+    steps: int
+    elapsed_s: float
+
+    @property
+    def steps_per_s(self):
+        if self.elapsed_s == 0:
+            return float("inf")
+        return self.steps / self.elapsed_s
+
+
 class Controller:
     """
     Needed functionality:
@@ -56,8 +100,27 @@ class Controller:
       - return full results for gui
     """
 
-    def __init__(self, config_file="config.json"):
-        self.market = Market()
+    def __init__(
+        self,
+        config_file="config.json",
+        step_clock: StepClock = None,
+        step_executor: ThreadPoolExecutor = None,
+        state_dir=DEFAULT_STATE_DIR,
+    ):
+        """
+        :param config_file: Config file, reloaded when it changes
+        :param step_clock: Clock pacing the steps (default: real-time)
+        :param step_executor: Single thread executor for the market and unit
+            steps, can be shared by several controllers
+        :param state_dir: Directory for state files, e.g. the auction archive
+        """
+        self.state_dir = state_dir
+        self.config_provider = ConfigProvider(config_file)
+        self.config = self.config_provider.get()
+        self._loop = None
+        self._config_changed = asyncio.Event()
+        self.config_provider.subscribe(self._apply_config)
+        self.market = create_market(self.config, state_dir=state_dir)
         self.unit_pool = UnitPool()
         self.registration_open = True
         self.current_market_task = asyncio.Future()
@@ -65,75 +128,235 @@ class Controller:
         self.current_unit_task = asyncio.Future()
         self.current_unit_task.set_result(None)
         self.registered = set()
-        self.config_file = config_file
-        self.config = load_config(self.config_file)
+        self.response_cache = ResponseCache()
+        self.snapshot = ControllerSnapshot()
+        self._snapshot_versions = itertools.count(1)
+        self._snapshot_lock = threading.Lock()
         self.step = 0
         self.actor_accounts = {}
         self.general_demand = None
         self.after_step_hooks = []
-        self.remaining_sleep = 0
+        # market and unit steps run one after another in this thread
+        self._owns_step_executor = step_executor is None
+        if step_executor is None:
+            step_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="step")
+        self._step_executor = step_executor
+        self.step_clock = StepClock() if step_clock is None else step_clock
+        self.ready_barrier = ReadyBarrier()
         self.actor_to_participant = {}
+        self._main_loop = None
 
     def init(self):
         logger.info("Init controller...")
         self._main_loop = asyncio.create_task(self.initiate_stepping())
 
-    def add_after_step_hook(self, hook):
+    @property
+    def running(self):
+        """True if the stepping loop was started and did not stop."""
+        return self._main_loop is not None and not self._main_loop.done()
+
+    @property
+    def config_file(self):
+        return self.config_provider.config_file
+
+    @config_file.setter
+    def config_file(self, config_file):
+        self.config_provider.config_file = config_file
+
+    def _apply_config(self, config: Config):
+        self.config = config
+        self.market.max_expired_auctions = config.max_expired_auctions
+        # file reloads notify from a worker thread
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._config_changed.set)
+
+    def update_config(self, config: Config):
+        self.config_provider.push(config)
+
+    def add_after_step_hook(self, hook, snapshot=None, queue_size=1):
+        """Add a hook, which is called after every step.
+
+        :param hook: Callable, called with the controller on the event loop,
+            or with the snapshot in a worker thread if snapshot is given
+        :param snapshot: Callable creating a consistent snapshot of the
+            controller for the hook, called on the event loop
+        :param queue_size: Number of snapshots which may wait for the hook,
+            further steps wait until the hook caught up
+        """
+        if snapshot is not None:
+            hook = HookWorker(hook, snapshot, queue_size=queue_size)
         self.after_step_hooks.append(hook)
 
-    async def _sleep_with_info_update(self, time_s):
-        remaining_time = time_s
-        self.remaining_sleep = remaining_time
-        while remaining_time >= 1:
-            await asyncio.sleep(1)
-            remaining_time -= 1
-            self.remaining_sleep = remaining_time
-        if remaining_time > 0:
-            await asyncio.sleep(remaining_time)
-            self.remaining_sleep = 0
+    async def _run_after_step_hooks(self):
+        # the snapshots have to contain the finished unit step
+        await self.check_unit_step_done()
+        for hook in self.after_step_hooks:
+            if isinstance(hook, HookWorker):
+                await hook.submit(self)
+            else:
+                hook(self)
+
+    async def join_after_step_hooks(self):
+        for hook in self.after_step_hooks:
+            if isinstance(hook, HookWorker):
+                await hook.join()
+
+    async def _run_step_work(self, step_function, **kwargs):
+        await asyncio.get_running_loop().run_in_executor(
+            self._step_executor, functools.partial(step_function, **kwargs)
+        )
+
+    def submit_step_work(self, function, *args) -> Future:
+        """Run function in the step thread after the step work submitted so
+        far, e.g. to read the units between two steps without blocking the
+        event loop."""
+        return self._step_executor.submit(function, *args)
+
+    @property
+    def remaining_sleep(self):
+        return self.step_clock.remaining_s
 
     async def initiate_stepping(self):
         try:
             logger.info(f"Delay finished, starting the loop...")
-            self.config = load_config(self.config_file)
+            await self.config_provider.refresh_async()
             self.general_demand = create_general_demand("gd0")
-            await self._sleep_with_info_update(self.config.rt_step_init_delay_s)
+            self.step_clock.schedule_in(self.config.rt_step_init_delay_s)
+            await self.step_clock.wait()
 
             while True:
-                self.config = load_config(self.config_file)
-                while self.config.pause or self.step == self.config.max_steps:
-                    self.config = load_config(self.config_file)
-                    self.remaining_sleep = -1
-                    await asyncio.sleep(1)
-                    self.remaining_sleep = 0
+                await self.config_provider.refresh_async()
+                if self.config.pause or self.step == self.config.max_steps:
+                    self.step_clock.paused = True
+                    while self.config.pause or self.step == self.config.max_steps:
+                        await self._wait_for_config_change()
+                    self.step_clock.paused = False
+                    self.step_clock.resync()
 
                 if not self.config.test_mode:
                     self.registration_open = False
 
                 logger.info("Starting market task... %s", self.step)
+                step_start = self.step_clock.now()
+                self.ready_barrier.begin(self.actor_to_participant.keys())
                 self.current_market_task = asyncio.create_task(
                     self.loop_market(self.step)
                 )
-                await self._sleep_with_info_update(self.config.rt_step_duration_s)
+                self.step_clock.schedule_next(self.config.rt_step_duration_s)
+                await self._wait_for_step_end(step_start)
                 self.current_unit_task = asyncio.create_task(self.loop_units(self.step))
                 logger.info("Step finished... %s", self.step)
                 self.step += 1
 
-                for hook in self.after_step_hooks:
-                    hook(self)
+                await self._run_after_step_hooks()
         except Exception as e:
             logger.exception("The main loop crashed!")
 
+    async def _wait_for_config_change(self):
+        self._loop = asyncio.get_running_loop()
+        self._config_changed.clear()
+        try:
+            await asyncio.wait_for(
+                self._config_changed.wait(), CONFIG_FILE_CHECK_INTERVAL_S
+            )
+        except asyncio.TimeoutError:
+            await self.config_provider.refresh_async()
+
+    async def _wait_for_step_end(self, step_start):
+        """Wait for the step deadline, or with the ready barrier enabled
+        until all actors are ready and the minimum dwell time passed."""
+        if self.config.ready_barrier is None:
+            await self.step_clock.wait()
+            return
+        try:
+            await asyncio.wait_for(
+                self.ready_barrier.wait(), timeout=self.step_clock.remaining_s
+            )
+        except asyncio.TimeoutError:
+            return
+        remaining_dwell_s = step_start + self.config.min_step_dwell_s
+        remaining_dwell_s -= self.step_clock.now()
+        if remaining_dwell_s > 0:
+            await asyncio.sleep(min(remaining_dwell_s, self.step_clock.remaining_s))
+        # the next step gets its full duration from now on
+        self.step_clock.resync()
+
+    async def signal_ready(self, actor_id):
+        """Signal that the actor is done for the current step."""
+        if self.config.ready_barrier is None:
+            raise ControlException(400, "The ready barrier is disabled!")
+        if actor_id not in self.actor_to_participant:
+            raise ControlException(404, "The actor id does not exist!")
+        self.ready_barrier.mark_ready([actor_id])
+        return self.ready_barrier.is_ready
+
+    def _mark_ready_by_orders(self, actor_ids):
+        if self.config.ready_barrier == "orders":
+            self.ready_barrier.mark_ready(actor_ids)
+
+    async def fast_forward(
+        self, n_steps: int, agents: Dict[str, Callable] = None
+    ) -> FastForwardReport:
+        """Run n_steps in-process, paced only by the step clock (e.g. a
+        FastForwardClock to run as fast as possible). The agents are called
+        between the market and the unit step of every step, like the
+        actors would send their orders during the real-time step.
+
+        :param n_steps: Number of steps to run
+        :param agents: Dict participant id -> callable(controller, actor_id,
+            current_time), which may be a coroutine function. The
+            participants are registered before the first step.
+        :return: Report with the number of steps and the elapsed time
+        """
+        agents = {} if agents is None else agents
+        actor_ids = {}
+        for participant_id in agents.keys():
+            actor_id = self._part_to_actor_id(participant_id)
+            if actor_id is None:
+                actor_id, _ = await self.register_actor(participant_id)
+            actor_ids[participant_id] = actor_id
+        if self.general_demand is None:
+            self.general_demand = create_general_demand("gd0")
+        if not self.config.test_mode:
+            self.registration_open = False
+
+        start = time.perf_counter()
+        for _ in range(n_steps):
+            current_time = self.get_current_simulation_time_unsafe()
+            # in the step thread like the real-time steps, so the after step
+            # hooks can read the units in it before the next step
+            await self._run_step_work(self.step_market, current_time=current_time)
+            self.step_clock.schedule_next(self.config.rt_step_duration_s)
+            for participant_id, agent in agents.items():
+                result = agent(self, actor_ids[participant_id], current_time)
+                if inspect.isawaitable(result):
+                    await result
+            await self.step_clock.wait()
+            await self._run_step_work(self.step_units, current_time=current_time)
+            self.step += 1
+
+            await self._run_after_step_hooks()
+        await self.join_after_step_hooks()
+        return FastForwardReport(
+            steps=n_steps, elapsed_s=time.perf_counter() - start
+        )
+
     async def loop_market(self, time_step):
         try:
-            self.step_market(current_time=time_step * SIMULATION_TIME_SECONDS_PER_STEP)
+            await self._run_step_work(
+                self.step_market,
+                current_time=time_step * SIMULATION_TIME_SECONDS_PER_STEP,
+            )
             logger.info("Market stepped... %s", self.step)
         except Exception as e:
             logger.exception("The market-step %s crashed!", time_step)
 
     async def loop_units(self, time_step):
         try:
-            self.step_units(current_time=time_step * SIMULATION_TIME_SECONDS_PER_STEP)
+            await self._run_step_work(
+                self.step_units,
+                current_time=time_step * SIMULATION_TIME_SECONDS_PER_STEP,
+            )
             logger.info("Units stepped... %s", self.step)
         except Exception as e:
             logger.exception("The unit-step %s crashed!", time_step)
@@ -167,6 +390,7 @@ class Controller:
             initiate_electricity_ask_auction(current_time, tender_amount=tender_amount)
         )
         self.market.step()
+        self.publish_market_snapshot()
 
     def step_units(self, current_time):
 
@@ -181,21 +405,25 @@ class Controller:
             tender_amount_kw = 0
         provided_amount_kw = 0
 
-        for actor_id in self.unit_pool.actor_to_root.keys():
-            # retrieve setpoint from awarded orders
-            setpoint = accounter.return_awarded_sum(actor_id)
-
-            # step actor
-            actor_result = self.unit_pool.step_actor(
-                uuid=actor_id,
-                input=UnitInput(
-                    delta_t=900,
-                    p_kw=setpoint,
-                    q_kvar=0,
-                ),
-                step=current_time // 900,
-                other_inputs=[],
-            )
+        # retrieve setpoints from awarded orders
+        setpoints = {
+            actor_id: accounter.return_awarded_sum(actor_id)
+            for actor_id in self.unit_pool.actors()
+        }
+
+        # step actors, in parallel if unit workers are configured
+        self._update_unit_workers()
+        actor_results = self.unit_pool.step_actors(
+            {
+                actor_id: UnitInput(delta_t=900, p_kw=setpoint, q_kvar=0)
+                for actor_id, setpoint in setpoints.items()
+            },
+            step=current_time // 900,
+        )
+
+        # settlement in actor order
+        for actor_id, setpoint in setpoints.items():
+            actor_result = actor_results[actor_id]
             logger.info("Stepped units of actor %s... %s", actor_id, actor_result)
 
             # store provided amount if bid was awarded
@@ -236,6 +464,64 @@ class Controller:
         self.general_demand.notify_supply(
             tender_amount_kw=tender_amount_kw, provided_amount_kw=provided_amount_kw
         )
+        self.publish_unit_snapshot()
+
+    def _publish_snapshot(self, **changes):
+        with self._snapshot_lock:
+            self.snapshot = dataclasses.replace(
+                self.snapshot, version=next(self._snapshot_versions), **changes
+            )
+
+    def publish_market_snapshot(self):
+        """Publish the open auctions and the auction results for the readers."""
+        self._publish_snapshot(
+            open_auction_params=tuple(
+                auction["params"] for auction in self.market.get_open_auctions()
+            ),
+            auction_results=tuple(self.market.current_auction_results),
+            current_auction_results=MappingProxyType(
+                self.market.get_current_auction_results()
+            ),
+        )
+
+    def publish_unit_snapshot(self, actors=None):
+        """Publish the unit information, balances and the demand for the
+        readers. The unit information of an actor is read on its first
+        access, so actors nobody asks for are not read at all.
+        :param actors: Actors whose unit information changed, read at once,
+            the other actors keep the information read so far (default: all
+            actors changed)
+        """
+        values = {}
+        if actors is not None:
+            values = self.snapshot.unit_information.loaded()
+            for actor, information in self.unit_pool.read_all_units(actors).items():
+                values[actor] = tuple(information)
+        self._publish_snapshot(
+            unit_information=LazyMapping(
+                self.unit_pool.actors(), self._read_unit_information, values
+            ),
+            balances=MappingProxyType(self.get_balance_dict_sync()),
+            demand=(
+                None
+                if self.general_demand is None
+                else self.general_demand.supply.copy()
+            ),
+        )
+
+    def _read_unit_information(self, actor):
+        return tuple(self.unit_pool.read_all_units([actor])[actor])
+
+    def publish_snapshot(self):
+        self.publish_market_snapshot()
+        self.publish_unit_snapshot()
+
+    def _update_unit_workers(self):
+        n_workers = self.config.unit_workers
+        if n_workers != self.unit_pool.n_workers:
+            self.unit_pool.detach_workers()
+            if n_workers > 0:
+                self.unit_pool.attach_workers(UnitWorkers(n_workers))
 
     async def check_market_step_done(self):
         if not self.current_market_task.done():
@@ -251,6 +537,7 @@ class Controller:
                 return a
 
     async def register_actor(self, participant_id: str) -> List[UnitInformation]:
+        await self.check_unit_step_done()
         if self.registration_open:
             logger.info("Registering actor %s...", participant_id)
 
@@ -258,7 +545,7 @@ class Controller:
                 if participant_id in self.registered:
                     if self.config.test_mode:
                         aid = self._part_to_actor_id(participant_id)
-                        return aid, self.unit_pool.read_units(aid)
+                        return aid, list(self.snapshot.unit_information[aid])
                     raise ControlException(
                         400, "The participant is already registered!"
                     )
@@ -271,43 +558,81 @@ class Controller:
             self.unit_pool.insert_actor_root(actor_id, root_unit)
             self.actor_accounts[actor_id] = Account()
             self.actor_to_participant[actor_id] = participant_id
-            return actor_id, self.unit_pool.read_units(actor_id)
+            self.publish_unit_snapshot(actors=[actor_id])
+            return actor_id, list(self.snapshot.unit_information[actor_id])
         else:
             raise ControlException(405, "Registration is closed!")
 
     async def read_units(self, actor_id) -> List[UnitInformation]:
-        await self.check_unit_step_done()
-
-        if not self.unit_pool.has_actor(actor_id):
+        unit_information = self.snapshot.unit_information
+        if actor_id not in unit_information:
             raise ControlException(404, "The actor id does not exist!")
-        return self.unit_pool.read_units(actor_id)
+        if not unit_information.is_loaded(actor_id):
+            # reading must not overlap with a unit step, which publishes a
+            # new snapshot when it is done
+            await self.check_unit_step_done()
+            unit_information = self.snapshot.unit_information
+        return list(unit_information[actor_id])
 
     async def return_open_auction_params(self):
         """Return open auction params to enable actors to place orders."""
-        await self.check_market_step_done()
-        return [auction["params"] for auction in self.market.get_open_auctions()]
+        return list(self.snapshot.open_auction_params)
+
+    async def return_open_auction_params_json(self) -> bytes:
+        """Return the serialized open auctions response, cached per snapshot."""
+        snapshot = self.snapshot
+        return self.response_cache.get(
+            "open_auctions",
+            snapshot.version,
+            lambda: {"auctions": list(snapshot.open_auction_params)},
+        )
 
 
-    async def return_price_history(self):
-        """Return open auction params to enable actors to place orders."""
+    async def return_price_history(self, offset=0, limit=None):
+        """Return the clearing prices of the expired auctions.
+        :param offset: Position of the first returned clearing price in the
+            order of expiry (number of auctions expired before it)
+        :param limit: Maximum number of returned clearing prices
+        """
+        self._check_history_window(offset, limit)
+        await self.check_market_step_done()
+        return self.market.get_price_history(offset, limit)
+
+    async def return_price_history_array(self, offset=0, limit=None):
+        """Return the clearing prices of the expired auctions as array of
+        doubles (nan if there was no clearing price)."""
+        self._check_history_window(offset, limit)
         await self.check_market_step_done()
-        return [auction.result.clearing_price for auction in self.market.expired_auctions]
+        return self.market.get_price_history_array(offset, limit)
+
+    def _check_history_window(self, offset, limit):
+        if offset < 0 or (limit is not None and limit < 0):
+            raise ControlException(400, "offset and limit must not be negative!")
 
 
     async def return_auction_results(self):
         """Return open auction params to enable actors to place orders."""
-        await self.check_market_step_done()
-        return self.market.current_auction_results
+        return list(self.snapshot.auction_results)
+
+    async def return_auction_results_json(self) -> bytes:
+        """Return the serialized auction results response, cached per snapshot."""
+        snapshot = self.snapshot
+        return self.response_cache.get(
+            "auction_results",
+            snapshot.version,
+            lambda: {"results": list(snapshot.auction_results)},
+        )
 
     async def receive_order(self, actor_ids, amount_kw, price_ct, supply_time):
         """Receive order from actor and pass it to market.
         :param actor_id: Actor identifier
         :param order: Order object
         :param supply_time: Supply time of the auction (key to select auction)
+        :return: Order id of the placed order
         """
         await self.check_market_step_done()
         try:
-            ok = self.market.receive_order(
+            order_id = self.market.receive_order(
                 amount_kw=amount_kw,
                 price_ct=price_ct,
                 agents=actor_ids,
@@ -318,27 +643,100 @@ class Controller:
             raise ControlException(400, str(e))
 
         # TODO move exception creation to the market
-        if ok:
-            return True
+        if order_id is not None:
+            self._mark_ready_by_orders(actor_ids)
+            return order_id
         else:
             raise ControlException(404, "The specified auction does not exist!")
 
+    async def receive_orders(self, orders):
+        """Receive several orders and pass them to the market at once.
+        :param orders: List of dicts with actor_ids, amount_kw, price_ct and
+            supply_time of each order
+        :return: List with a result dict (order_ok, order_id, detail) per order
+        """
+        await self.check_market_step_done()
+        results = self.market.receive_orders(
+            [
+                {
+                    "amount_kw": order["amount_kw"],
+                    "price_ct": order["price_ct"],
+                    "agents": order["actor_ids"],
+                    "supply_time": order["supply_time"],
+                    "product_type": "electricity",
+                }
+                for order in orders
+            ]
+        )
+        for order, (order_id, error) in zip(orders, results):
+            if error is None:
+                self._mark_ready_by_orders(order["actor_ids"])
+        return [
+            {"order_ok": error is None, "order_id": order_id, "detail": error}
+            for order_id, error in results
+        ]
+
+    async def cancel_order(self, actor_id, order_id):
+        """Cancel an order of the actor in an open auction.
+        :param actor_id: Actor identifier
+        :param order_id: Order id returned on placement
+        """
+        await self.check_market_step_done()
+        try:
+            ok = self.market.cancel_order(order_id, actor_id)
+        except OrderAccessException as e:
+            raise ControlException(403, str(e))
+        except Exception as e:
+            raise ControlException(400, str(e))
+        if not ok:
+            raise ControlException(404, "The specified order does not exist!")
+        return True
+
+    async def amend_order(self, actor_id, order_id, amount_kw=None, price_ct=None):
+        """Change the amount and/or price of an order of the actor in an open
+        auction.
+        :param actor_id: Actor identifier
+        :param order_id: Order id returned on placement
+        :param amount_kw: New amounts of the order (one per agent)
+        :param price_ct: New price of the order
+        """
+        await self.check_market_step_done()
+        try:
+            ok = self.market.amend_order(
+                order_id, actor_id, amount_kw=amount_kw, price_ct=price_ct
+            )
+        except OrderAccessException as e:
+            raise ControlException(403, str(e))
+        except Exception as e:
+            raise ControlException(400, str(e))
+        if not ok:
+            raise ControlException(404, "The specified order does not exist!")
+        return True
+
     async def return_awarded_orders(self, actor_id):
         """Return awarded orders for actor.
         :param actor_id: Actor identifier
         """
-        await self.check_market_step_done()
+        return self._awarded_orders(self.snapshot, actor_id)
+
+    async def return_awarded_orders_json(self, actor_id) -> bytes:
+        """Return the serialized awarded orders of the actor, cached per snapshot.
+        :param actor_id: Actor identifier
+        """
+        snapshot = self.snapshot
+        return self.response_cache.get(
+            ("awarded_orders", actor_id),
+            snapshot.version,
+            lambda: self._awarded_orders(snapshot, actor_id),
+        )
 
-        current_results = self.market.get_current_auction_results()
+    def _awarded_orders(self, snapshot: ControllerSnapshot, actor_id):
+        current_results = snapshot.current_auction_results
         relevant_results = {}
         # filter results for actor/agent
         for auction_result in current_results.values():
             relevant_results[auction_result.params.supply_start_time] = {
-                "order": [
-                    awarded_order
-                    for awarded_order in auction_result.awarded_orders
-                    if actor_id in awarded_order.agents
-                ],
+                "order": auction_result.get_awarded_orders_of_agent(actor_id),
                 "clearing_price": auction_result.clearing_price,
             }
             # TODO Each "order" contains an "auction_id", which the actors
@@ -349,22 +747,20 @@ class Controller:
         """
         Returns current auction results based on product type and supply time
         """
-        await self.check_market_step_done()
-        return self.market.get_current_auction_results()
+        return dict(self.snapshot.current_auction_results)
 
     def get_balance_dict_sync(self):
         return {str(k): v.get_balance() for k, v in self.actor_accounts.items()}
 
     async def get_balance_dict(self):
-        await self.check_market_step_done()
-        return {str(k): v.get_balance() for k, v in self.actor_accounts.items()}
+        return dict(self.snapshot.balances)
 
     async def get_gd_df(self) -> pd.DataFrame:
-        await self.check_market_step_done()
-        return self.general_demand.supply
+        return self.snapshot.demand
 
     def reset(self):
         self.market.reset()
+        self.publish_market_snapshot()
 
         return {
             f"{result.params.supply_start_time}_{result.params.product_type}": result
@@ -376,3 +772,10 @@ class Controller:
             self._main_loop.cancel()
         except:
             pass
+        for hook in self.after_step_hooks:
+            if isinstance(hook, HookWorker):
+                hook.stop()
+        self.unit_pool.detach_workers()
+        # a shared step executor is shut down by its owner
+        if self._owns_step_executor:
+            self._step_executor.shutdown(wait=False)
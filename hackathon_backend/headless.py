@@ -0,0 +1,77 @@
+"""Run the competition in-process as fast as possible, without HTTP and
+real-time pacing, e.g. for strategy research.
+
+    python -m hackathon_backend.headless --steps 96 \\
+        --agent Student123=my_package.my_module:my_agent
+
+An agent is a callable(controller, actor_id, current_time), it may be a
+coroutine function and places its orders via the controller.
+"""
+
+import argparse
+import asyncio
+import importlib
+import logging
+from hackathon_backend.clock import FastForwardClock
+from hackathon_backend.controller import Controller
+
+logger = logging.getLogger(__name__)
+
+
+def load_agent(spec: str):
+    """Load an agent from a "module:callable" spec."""
+    module_name, _, attribute = spec.partition(":")
+    if not attribute:
+        raise ValueError(f"The agent {spec} has to be given as module:callable!")
+    return getattr(importlib.import_module(module_name), attribute)
+
+
+def parse_agents(agent_args):
+    agents = {}
+    for agent_arg in agent_args:
+        participant_id, _, spec = agent_arg.partition("=")
+        if not spec:
+            raise ValueError(
+                f"The agent {agent_arg} has to be given as participant_id=module:callable!"
+            )
+        agents[participant_id] = load_agent(spec)
+    return agents
+
+
+async def run(config_file, n_steps=None, agents=None):
+    controller = Controller(config_file, step_clock=FastForwardClock())
+    if n_steps is None:
+        n_steps = controller.config.max_steps
+    report = await controller.fast_forward(n_steps, agents)
+    return controller, report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Run the competition in-process without real-time pacing."
+    )
+    parser.add_argument("--config", default="config.json", help="config file")
+    parser.add_argument(
+        "--steps", type=int, default=None, help="number of steps (default: max_steps)"
+    )
+    parser.add_argument(
+        "--agent",
+        action="append",
+        default=[],
+        help="participant_id=module:callable, can be given multiple times",
+    )
+    args = parser.parse_args(argv)
+
+    controller, report = asyncio.run(
+        run(args.config, args.steps, parse_agents(args.agent))
+    )
+    print(
+        f"{report.steps} steps in {report.elapsed_s:.3f} s "
+        f"({report.steps_per_s:.1f} steps/s)"
+    )
+    for actor_id, balance in controller.get_balance_dict_sync().items():
+        print(f"{controller.actor_to_participant.get(actor_id, actor_id)}: {balance}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,15 @@
+import sys
 import time
 import logging
-from typing import List
-from fastapi import APIRouter, HTTPException
+import secrets
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from pydantic import BaseModel
+from hackathon_backend.competition import CompetitionRegistry
+from hackathon_backend.config import Config
 from hackathon_backend.controller import Controller, ControlException
 from hackathon_backend.persistence import JsonPersistenceHandler
+from hackathon_backend.rate_limit import RateLimiter
 from hackathon_backend.score import CsvScoreHandler
 
 router = APIRouter()
@@ -11,14 +17,120 @@ router = APIRouter()
 controller: Controller = Controller()
 persistence_handler = JsonPersistenceHandler("app_state.json")
 score_handler = CsvScoreHandler(time.time())
-controller.add_after_step_hook(lambda controller: persistence_handler.write(controller))
-controller.add_after_step_hook(lambda controller: score_handler.write(controller))
+controller.add_after_step_hook(
+    persistence_handler.write_snapshot, snapshot=persistence_handler.snapshot
+)
+controller.add_after_step_hook(
+    score_handler.write_snapshot, snapshot=score_handler.snapshot
+)
+
+registry = CompetitionRegistry()
+rate_limiter = RateLimiter()
 
 logger = logging.getLogger(__name__)
 
+
+def current_controller(request: Request) -> Controller:
+    """Controller of the competition in the path, or the default one."""
+    competition_id = request.path_params.get("competition_id")
+    if competition_id is None:
+        return controller
+    try:
+        return registry.get(competition_id).controller
+    except KeyError:
+        raise HTTPException(404, "The competition does not exist!")
+
+
+LOCAL_HOSTS = ("127.0.0.1", "::1", "localhost")
+
+
+async def admin_guard(request: Request):
+    """Admin endpoints require the admin token of the config in the
+    X-Admin-Token header, without a token only local clients are admitted."""
+    admin_token = current_controller(request).config.admin_token
+    if admin_token is None:
+        if request.client is None or request.client.host not in LOCAL_HOSTS:
+            raise HTTPException(403, "The admin endpoints are only available locally!")
+        return
+    token = request.headers.get("X-Admin-Token", "")
+    if not secrets.compare_digest(token.encode(), admin_token.encode()):
+        raise HTTPException(403, "Invalid admin token!")
+
+
+async def _claimed_actor_ids(request: Request):
+    params = request.query_params
+    if "actor_id" in params:
+        return params.getlist("actor_id")
+    if "actor_ids" in params:
+        return params.getlist("actor_ids")
+    if request.method != "POST":
+        return []
+    # group orders send {"actor_ids": [...], ...}, batches a list of orders
+    try:
+        body = await request.json()
+    except ValueError:
+        return []
+    if isinstance(body, dict):
+        body = [body]
+    if not isinstance(body, list):
+        return []
+    actor_ids = []
+    for item in body:
+        if isinstance(item, dict) and isinstance(item.get("actor_ids"), list):
+            actor_ids.extend(item["actor_ids"])
+    return actor_ids
+
+
+async def _rate_limit_key(request: Request, controller: Controller):
+    """Key the request by the first registered actor it claims to act for.
+    Ids are not authenticated, so requests with unknown ids share the bucket
+    of their client host instead of getting a fresh bucket per made up id."""
+    key = None
+    for actor_id in await _claimed_actor_ids(request):
+        if isinstance(actor_id, str) and controller.unit_pool.has_actor(actor_id):
+            key = actor_id
+            break
+    if key is None:
+        key = request.client.host if request.client is not None else "unknown"
+    competition_id = request.path_params.get("competition_id")
+    if competition_id is not None:
+        key = f"{competition_id}/{key}"
+    return key
+
+
+def _rate_limit(budget: str):
+    # async, so rejecting a request does not need a threadpool worker
+    async def check(request: Request):
+        controller = current_controller(request)
+        rate_per_s = getattr(controller.config, f"{budget}_rate_limit_per_s")
+        if rate_per_s is None:
+            return
+        burst = getattr(controller.config, f"{budget}_rate_limit_burst")
+        key = await _rate_limit_key(request, controller)
+        if not rate_limiter.allow(budget, key, rate_per_s, burst):
+            raise HTTPException(429, "Too many requests!")
+
+    return check
+
+
+read_rate_limit = _rate_limit("read")
+order_rate_limit = _rate_limit("order")
+
+
+class OrderRequest(BaseModel):
+    actor_ids: List[str]
+    amount_kw: List[float]
+    price_ct: float
+    supply_time: int
+
+
 @router.post("/hackathon/register")
 @router.post("/hackathon/register/")
-async def register_actor(participant_id: str):
+async def register_actor(
+    participant_id: str,
+    controller: Controller = Depends(current_controller),
+    _=Depends(order_rate_limit),
+):
     try:
         actor_id, unit_information_list = await controller.register_actor(
             participant_id
@@ -33,7 +145,11 @@ async def register_actor(participant_id: str):
 
 @router.get("/units/information")
 @router.get("/units/information/")
-async def read_unit_information(actor_id: str):
+async def read_unit_information(
+    actor_id: str,
+    _=Depends(read_rate_limit),
+    controller: Controller = Depends(current_controller),
+):
     try:
         unit_information_list = await controller.read_units(actor_id)
         return {
@@ -45,9 +161,15 @@ async def read_unit_information(actor_id: str):
 
 @router.get("/market/auction/open")
 @router.get("/market/auction/open/")
-async def read_auctions():
+async def read_auctions(
+    _=Depends(read_rate_limit),
+    controller: Controller = Depends(current_controller),
+):
     try:
-        return {"auctions": await controller.return_open_auction_params()}
+        return Response(
+            await controller.return_open_auction_params_json(),
+            media_type="application/json",
+        )
     except ControlException as e:
         raise HTTPException(e.code, e.message)
 
@@ -55,9 +177,33 @@ async def read_auctions():
 
 @router.get("/market/auction/price_history")
 @router.get("/market/auction/price_history/")
-async def read_market_history():
+async def read_market_history(
+    offset: int = 0,
+    limit: Optional[int] = None,
+    binary: bool = False,
+    _=Depends(read_rate_limit),
+    controller: Controller = Depends(current_controller),
+):
+    """Clearing prices of the expired auctions in the order of their expiry,
+    starting at position offset. The offset counts expired auctions, it is
+    not a market step; next_offset (X-Next-Offset for binary) continues
+    after the returned prices. With binary=true the prices are returned as
+    little-endian float64 values (NaN if there was no clearing price)."""
     try:
-        return {"price_history": await controller.return_price_history()}
+        if binary:
+            prices = await controller.return_price_history_array(offset, limit)
+            if sys.byteorder != "little":
+                prices.byteswap()
+            return Response(
+                content=prices.tobytes(),
+                media_type="application/octet-stream",
+                headers={"X-Next-Offset": str(offset + len(prices))},
+            )
+        price_history = await controller.return_price_history(offset, limit)
+        return {
+            "price_history": price_history,
+            "next_offset": offset + len(price_history),
+        }
     except ControlException as e:
         raise HTTPException(e.code, e.message)
 
@@ -65,14 +211,18 @@ async def read_market_history():
 @router.post("/market/auction/order")
 @router.post("/market/auction/order/")
 async def place_order(
-    actor_id: str, amount_kw: float, price_ct: float, supply_time: int
+    actor_id: str,
+    amount_kw: float,
+    price_ct: float,
+    supply_time: int,
+    _=Depends(order_rate_limit),
+    controller: Controller = Depends(current_controller),
 ):
     try:
-        return {
-            "order_ok": await controller.receive_order(
-                [actor_id], [amount_kw], price_ct, supply_time
-            )
-        }
+        order_id = await controller.receive_order(
+            [actor_id], [amount_kw], price_ct, supply_time
+        )
+        return {"order_ok": True, "order_id": order_id}
     except ControlException as e:
         raise HTTPException(e.code, e.message)
 
@@ -80,12 +230,103 @@ async def place_order(
 @router.post("/market/auction/grouporder")
 @router.post("/market/auction/grouporder/")
 async def place_order(
-    actor_ids: List[str], amount_kw: List[float], price_ct: float, supply_time: int
+    actor_ids: List[str],
+    amount_kw: List[float],
+    price_ct: float,
+    supply_time: int,
+    _=Depends(order_rate_limit),
+    controller: Controller = Depends(current_controller),
+):
+    try:
+        order_id = await controller.receive_order(
+            actor_ids, amount_kw, price_ct, supply_time
+        )
+        return {"order_ok": True, "order_id": order_id}
+    except ControlException as e:
+        raise HTTPException(e.code, e.message)
+
+
+@router.post("/market/ready")
+@router.post("/market/ready/")
+async def signal_ready(
+    actor_id: str,
+    _=Depends(order_rate_limit),
+    controller: Controller = Depends(current_controller),
+):
+    try:
+        return {"all_ready": await controller.signal_ready(actor_id)}
+    except ControlException as e:
+        raise HTTPException(e.code, e.message)
+
+
+@router.post("/market/auction/order/cancel")
+@router.post("/market/auction/order/cancel/")
+async def cancel_order(
+    actor_id: str,
+    order_id: str,
+    _=Depends(order_rate_limit),
+    controller: Controller = Depends(current_controller),
+):
+    try:
+        return {"cancel_ok": await controller.cancel_order(actor_id, order_id)}
+    except ControlException as e:
+        raise HTTPException(e.code, e.message)
+
+
+@router.post("/market/auction/order/amend")
+@router.post("/market/auction/order/amend/")
+async def amend_order(
+    actor_id: str,
+    order_id: str,
+    amount_kw: Optional[float] = None,
+    price_ct: Optional[float] = None,
+    _=Depends(order_rate_limit),
+    controller: Controller = Depends(current_controller),
+):
+    try:
+        return {
+            "amend_ok": await controller.amend_order(
+                actor_id,
+                order_id,
+                amount_kw=None if amount_kw is None else [amount_kw],
+                price_ct=price_ct,
+            )
+        }
+    except ControlException as e:
+        raise HTTPException(e.code, e.message)
+
+
+@router.post("/market/auction/grouporder/amend")
+@router.post("/market/auction/grouporder/amend/")
+async def amend_group_order(
+    actor_id: str,
+    order_id: str,
+    amount_kw: Optional[List[float]] = None,
+    price_ct: Optional[float] = None,
+    _=Depends(order_rate_limit),
+    controller: Controller = Depends(current_controller),
+):
+    try:
+        return {
+            "amend_ok": await controller.amend_order(
+                actor_id, order_id, amount_kw=amount_kw, price_ct=price_ct
+            )
+        }
+    except ControlException as e:
+        raise HTTPException(e.code, e.message)
+
+
+@router.post("/market/auction/orders/batch")
+@router.post("/market/auction/orders/batch/")
+async def place_orders(
+    orders: List[OrderRequest],
+    _=Depends(order_rate_limit),
+    controller: Controller = Depends(current_controller),
 ):
     try:
         return {
-            "order_ok": await controller.receive_order(
-                actor_ids, amount_kw, price_ct, supply_time
+            "results": await controller.receive_orders(
+                [order.model_dump() for order in orders]
             )
         }
     except ControlException as e:
@@ -94,16 +335,26 @@ async def place_order(
 
 @router.get("/market/auction/result")
 @router.get("/market/auction/result/")
-async def read_auction_result(actor_id: str):
+async def read_auction_result(
+    actor_id: str,
+    _=Depends(read_rate_limit),
+    controller: Controller = Depends(current_controller),
+):
     try:
-        return await controller.return_awarded_orders(actor_id)
+        return Response(
+            await controller.return_awarded_orders_json(actor_id),
+            media_type="application/json",
+        )
     except ControlException as e:
         raise HTTPException(e.code, e.message)
 
 
 @router.get("/account/balances")
 @router.get("/account/balances/")
-async def read_balances():
+async def read_balances(
+    _=Depends(read_rate_limit),
+    controller: Controller = Depends(current_controller),
+):
     try:
         return await controller.get_balance_dict()
     except ControlException as e:
@@ -112,7 +363,10 @@ async def read_balances():
 
 @router.get("/system/demand")
 @router.get("/system/demand/")
-async def read_demand():
+async def read_demand(
+    _=Depends(read_rate_limit),
+    controller: Controller = Depends(current_controller),
+):
     try:
         return (await controller.get_gd_df()).to_json()
     except ControlException as e:
@@ -121,36 +375,96 @@ async def read_demand():
 
 @router.post("/admin/load")
 @router.post("/admin/load/")
-async def load_from_file():
+async def load_from_file(request: Request, _=Depends(admin_guard)):
     global controller
-    controller = persistence_handler.load()
-    controller.add_after_step_hook(
-        lambda controller: persistence_handler.write(controller)
+    competition_id = request.path_params.get("competition_id")
+    if competition_id is not None:
+        current_controller(request)
+        registry.load(competition_id)
+        return
+    loaded = persistence_handler.load()
+    loaded.add_after_step_hook(
+        persistence_handler.write_snapshot, snapshot=persistence_handler.snapshot
     )
+    # the replaced controller must not keep its loop, threads and workers
+    running = controller.running
+    controller.shutdown()
+    controller = loaded
+    if running:
+        controller.init()
+
+
+@router.post("/admin/config")
+@router.post("/admin/config/")
+async def push_config(
+    config: Config,
+    _=Depends(admin_guard),
+    controller: Controller = Depends(current_controller),
+):
+    """Replace the active config until the config file changes again."""
+    controller.update_config(config)
+    return {"config_ok": True}
+
+
+@router.get("/admin/rate_limits")
+@router.get("/admin/rate_limits/")
+async def read_rate_limits(_=Depends(admin_guard)):
+    return rate_limiter.get_counters()
 
 
 @router.get("/ui/auction/results")
 @router.get("/ui/auction/results/")
-async def read_results():
+async def read_results(
+    _=Depends(read_rate_limit),
+    controller: Controller = Depends(current_controller),
+):
     try:
-        return {"results": await controller.return_auction_results()}
+        return Response(
+            await controller.return_auction_results_json(),
+            media_type="application/json",
+        )
     except ControlException as e:
         raise HTTPException(e.code, e.message)
 
 
 @router.get("/ui/next_step")
 @router.get("/ui/next_step/")
-async def seconds_until_next_step():
+async def seconds_until_next_step(controller: Controller = Depends(current_controller)):
     return controller.remaining_sleep
 
 
 @router.get("/ui/current_st")
 @router.get("/ui/current_st/")
-async def last_step_simulation_time():
+async def last_step_simulation_time(controller: Controller = Depends(current_controller)):
     return controller.get_current_simulation_time_unsafe()
 
 
 @router.get("/ui/participant_map")
 @router.get("/ui/participant_map/")
-async def participant_map():
+async def participant_map(controller: Controller = Depends(current_controller)):
     return controller.actor_to_participant
+
+
+# all routes, scoped by competition
+competition_router = APIRouter()
+competition_router.include_router(router, prefix="/competitions/{competition_id}")
+
+
+@competition_router.get("/competitions")
+@competition_router.get("/competitions/")
+async def read_competitions():
+    return {"competitions": registry.ids()}
+
+
+@competition_router.post("/competitions")
+@competition_router.post("/competitions/")
+async def create_competition(competition_id: str, _=Depends(admin_guard)):
+    """Start a competition of the config, which was added after startup."""
+    config_file = controller.config.competitions.get(competition_id)
+    if config_file is None:
+        raise HTTPException(404, "The competition is not configured!")
+    try:
+        registry.create(competition_id, config_file)
+    except (ValueError, OSError) as e:
+        raise HTTPException(400, str(e))
+    return {"competition_id": competition_id}
@@ -18,14 +18,18 @@ async def lifespan(app: FastAPI):
     # StartUp
     logger.info("Controller startup FASTAPI hook called!")
     interface.controller.init()
+    interface.registry.create_all(interface.controller.config.competitions)
+    interface.registry.start()
 
     yield
 
     # ShutDown
     logger.info("Controller shutdown FASTAPI hook called!")
     interface.controller.shutdown()
+    interface.registry.shutdown()
 
 
 # FastAPI object
 app = FastAPI(lifespan=lifespan)
 app.include_router(interface.router)
+app.include_router(interface.competition_router)
@@ -0,0 +1,70 @@
+from typing import Iterator, Optional
+import itertools
+from pathlib import Path
+from pydantic import BaseModel
+from .auction import Auction, AuctionParameters, AuctionResult
+
+
+class ArchivedAuction(BaseModel):
+    id: str
+    status: str
+    params: AuctionParameters
+    result: Optional[AuctionResult]
+
+
+class AuctionArchive:
+    """Append-only on-disk segment (JSON lines) for expired auctions, which
+    are no longer kept in memory. The orders of an auction are not archived,
+    the awarded orders are still contained in its result.
+
+    Only the first `size` lines of the file belong to the archive, so a
+    stale file of an earlier run is overwritten and a restored archive
+    ignores lines written after its state was persisted."""
+
+    def __init__(self, fp, size=0) -> None:
+        self.fp = Path(fp)
+        self._size = size
+        # a restored archive is truncated to its size before appending
+        self._truncated = size == 0
+
+    def append(self, auction: Auction):
+        archived = ArchivedAuction(
+            id=auction.id,
+            status=auction.status,
+            params=auction.params,
+            result=auction.result,
+        )
+        if self._size == 0:
+            mode = "w"
+            self.fp.parent.mkdir(parents=True, exist_ok=True)
+        else:
+            mode = "a"
+            self._truncate_to_size()
+        with open(self.fp, mode) as f:
+            f.write(archived.model_dump_json() + "\n")
+        self._size += 1
+
+    def _truncate_to_size(self):
+        if self._truncated:
+            return
+        with open(self.fp, "r+") as f:
+            for _ in range(self._size):
+                f.readline()
+            f.truncate(f.tell())
+        self._truncated = True
+
+    def read(self) -> Iterator[ArchivedAuction]:
+        if self._size == 0:
+            return
+        with open(self.fp) as f:
+            for line in itertools.islice(f, self._size):
+                yield ArchivedAuction.model_validate_json(line)
+
+    def clear(self):
+        if self.fp.exists():
+            self.fp.unlink()
+        self._size = 0
+        self._truncated = True
+
+    def __len__(self):
+        return self._size
@@ -1,10 +1,15 @@
 from typing import Optional
 from abc import ABC, abstractmethod
-from pydantic import BaseModel
-from typing import List
+from pydantic import BaseModel, PrivateAttr
+from typing import Dict, List, Tuple
+import bisect
 import datetime
+import itertools
 import uuid
 import logging
+import numpy as np
+
+from .clearing import clear_merit_order
 
 logger = logging.getLogger(__name__)
 
@@ -25,6 +30,7 @@ class Order(BaseModel):
     amount_kw: List[float]
     price_ct: float
     auction_id: str
+    order_id: Optional[str] = None
 
 
 class AwardedOrder(Order):
@@ -36,16 +42,204 @@ class AuctionResult(BaseModel):
     params: AuctionParameters
     clearing_price: Optional[float]
     awarded_orders: List[AwardedOrder]
+    # agent -> [(awarded order, index of the agent in the order)]
+    _agent_awards: Optional[Dict[str, List[Tuple[AwardedOrder, int]]]] = PrivateAttr(
+        default=None
+    )
+
+    def index_agent_awards(self):
+        """Build the index from agents to their awarded orders."""
+        agent_awards = {}
+        for awarded_order in self.awarded_orders:
+            for i, agent in enumerate(awarded_order.agents):
+                agent_awards.setdefault(agent, []).append((awarded_order, i))
+        self._agent_awards = agent_awards
+
+    def get_agent_awards(self, agent) -> List[Tuple[AwardedOrder, int]]:
+        """Return the awarded orders of the agent together with the index of
+        the agent in each order (an agent can be part of an order twice)."""
+        if self._agent_awards is None:
+            self.index_agent_awards()
+        return self._agent_awards.get(agent, [])
+
+    def get_awarded_orders_of_agent(self, agent) -> List[AwardedOrder]:
+        """Return the awarded orders the agent is part of."""
+        awarded_orders = []
+        for awarded_order, _ in self.get_agent_awards(agent):
+            if not awarded_orders or awarded_orders[-1] is not awarded_order:
+                awarded_orders.append(awarded_order)
+        return awarded_orders
+
+
+class OrderRecord:
+    """Compact internal representation of a placed order. The inputs are
+    validated at the API, so no pydantic model is built when placing an
+    order, conversion to Order only happens at the API and persistence
+    boundaries."""
+
+    __slots__ = (
+        "agents",
+        "amount_kw",
+        "price_ct",
+        "auction_id",
+        "total_kw",
+        "order_id",
+    )
+
+    def __init__(
+        self, agents, amount_kw, price_ct, auction_id, total_kw=None, order_id=None
+    ):
+        self.agents = agents
+        self.amount_kw = amount_kw
+        self.price_ct = price_ct
+        self.auction_id = auction_id
+        self.total_kw = sum(amount_kw) if total_kw is None else total_kw
+        self.order_id = order_id
+
+    @classmethod
+    def from_order(cls, order: Order) -> "OrderRecord":
+        return cls(
+            agents=order.agents,
+            amount_kw=order.amount_kw,
+            price_ct=order.price_ct,
+            auction_id=order.auction_id,
+            order_id=order.order_id,
+        )
+
+    def to_order(self) -> Order:
+        return Order(
+            agents=self.agents,
+            amount_kw=self.amount_kw,
+            price_ct=self.price_ct,
+            auction_id=self.auction_id,
+            order_id=self.order_id,
+        )
+
+    def to_awarded_order(self, awarded_amount_kw) -> AwardedOrder:
+        return AwardedOrder(
+            agents=self.agents,
+            amount_kw=self.amount_kw,
+            price_ct=self.price_ct,
+            auction_id=self.auction_id,
+            order_id=self.order_id,
+            awarded_amount_kw=awarded_amount_kw,
+        )
+
+    def __repr__(self):
+        return (
+            f"OrderRecord(order_id={self.order_id}, agents={self.agents}, "
+            f"amount_kw={self.amount_kw}, price_ct={self.price_ct}, "
+            f"auction_id={self.auction_id})"
+        )
+
+
+ORDER_ID_SEPARATOR = ":"
+
+
+def create_order_id(auction_id, order_number):
+    return f"{auction_id}{ORDER_ID_SEPARATOR}{order_number}"
+
+
+def auction_id_of_order(order_id):
+    """Return the id of the auction the order id belongs to."""
+    return order_id.rpartition(ORDER_ID_SEPARATOR)[0]
 
 
 class OrderContainer:
-    orders: List[Order]
+    """Order book which keeps the orders sorted by price while they are
+    inserted. Orders are grouped in price levels, the distinct prices are
+    kept in a sorted list, so that placing an order only needs a binary
+    search. A level maps the order ids to the orders in their arrival
+    order, so orders with an order id can be looked up, removed and updated
+    in constant time, however crowded their level is."""
+
+    _prices: List[float]
+    _levels: Dict[float, Dict[object, OrderRecord]]
+    _level_totals: Dict[float, Dict[object, float]]
+    _by_id: Dict[str, OrderRecord]
 
     def __init__(self) -> None:
-        self.orders = []
+        self._prices = []
+        self._levels = {}
+        # total amount of the orders per price level (column of the levels)
+        self._level_totals = {}
+        self._by_id = {}
+        self._size = 0
+        # level keys of the orders without order id
+        self._anonymous_keys = itertools.count()
+
+    def add_order(self, order: OrderRecord):
+        level = self._levels.get(order.price_ct)
+        if level is None:
+            level = {}
+            self._levels[order.price_ct] = level
+            self._level_totals[order.price_ct] = {}
+            bisect.insort(self._prices, order.price_ct)
+        if order.order_id is None:
+            key = next(self._anonymous_keys)
+        else:
+            key = order.order_id
+            self._by_id[order.order_id] = order
+        level[key] = order
+        self._level_totals[order.price_ct][key] = order.total_kw
+        self._size += 1
+
+    def get_order(self, order_id) -> Optional[OrderRecord]:
+        return self._by_id.get(order_id)
+
+    def remove_order(self, order_id) -> OrderRecord:
+        order = self._by_id.pop(order_id)
+        level = self._levels[order.price_ct]
+        del level[order_id]
+        del self._level_totals[order.price_ct][order_id]
+        if len(level) == 0:
+            del self._levels[order.price_ct]
+            del self._level_totals[order.price_ct]
+            del self._prices[bisect.bisect_left(self._prices, order.price_ct)]
+        self._size -= 1
+        return order
+
+    def update_amount(self, order_id, amount_kw: List[float]):
+        """Update the amount of an order in place (it keeps its position)."""
+        order = self._by_id[order_id]
+        order.amount_kw = amount_kw
+        order.total_kw = sum(amount_kw)
+        self._level_totals[order.price_ct][order_id] = order.total_kw
+
+    def to_columns(self):
+        """Return the orders sorted by price together with the columns
+        (price, total amount) as numpy arrays, the array index is the index
+        of the order in the returned list."""
+        orders = list(self)
+        level_sizes = [len(self._levels[price]) for price in self._prices]
+        prices_ct = np.repeat(np.asarray(self._prices, dtype=float), level_sizes)
+        total_amounts_kw = np.fromiter(
+            itertools.chain.from_iterable(
+                self._level_totals[price].values() for price in self._prices
+            ),
+            dtype=float,
+            count=self._size,
+        )
+        return orders, prices_ct, total_amounts_kw
+
+    @property
+    def orders(self) -> List[OrderRecord]:
+        """All orders sorted by price (ascending)."""
+        return list(self)
+
+    @orders.setter
+    def orders(self, orders: List[OrderRecord]):
+        self.__init__()
+        for order in orders:
+            self.add_order(order)
+
+    def __iter__(self):
+        return itertools.chain.from_iterable(
+            self._levels[price].values() for price in self._prices
+        )
 
-    def add_order(self, order: Order):
-        self.orders.append(order)
+    def __len__(self):
+        return self._size
 
 
 class Auction(ABC):
@@ -65,6 +259,11 @@ class Auction(ABC):
     def place_order(self, amount_kw, price_ct, agents):
         """Place an order in the auction"""
 
+    @abstractmethod
+    def next_status_change_time(self, current_time):
+        """Return the next time after current_time at which the status of
+        the auction changes (None if it will not change anymore)"""
+
 
 class ElectricityAskAuction(Auction):
     """Auction at which market players can sell electricity"""
@@ -73,6 +272,8 @@ class ElectricityAskAuction(Auction):
         super().__init__(params, current_time)
         # container for all orders (only one type of order in this case)
         self.order_container = OrderContainer()
+        # number of placed orders, used to create order ids
+        self.order_count = 0
 
         # set auction status
         self.update_status(current_time)
@@ -85,30 +286,89 @@ class ElectricityAskAuction(Auction):
         self.update_status(current_time)
 
     def place_order(self, amount_kw, price_ct, agents):
-        # limit order price
-        if price_ct > self.params.maximum_price_ct:
-            price_ct = self.params.maximum_price_ct
+        """Place an order and return its order id"""
+        if isinstance(agents, str) or isinstance(amount_kw, str):
+            raise Exception("Order not valid, agents and amount_kw must be lists!")
+        price_ct = self._limit_price(price_ct)
+        amount_kw = [float(amount) for amount in amount_kw]
+        total_kw = sum(amount_kw)
         # place order
-        if (
-            self.status == "open"
-            and sum(amount_kw) >= self.params.minimum_order_amount_kw
-        ):
-            # create order object
-            order = Order(
-                auction_id=self.id,
+        if self._is_valid_amount(total_kw):
+            # create internal order record
+            order = OrderRecord(
+                agents=list(agents),
                 amount_kw=amount_kw,
                 price_ct=price_ct,
-                agents=agents,
+                auction_id=self.id,
+                total_kw=total_kw,
+                order_id=create_order_id(self.id, self.order_count),
             )
+            self.order_count += 1
             # store order
             self.order_container.add_order(order)
 
-            logger.info(f"Auction {self.id}: Received and stored order {order}")
+            logger.info("Auction %s: Received and stored order %s", self.id, order)
+            return order.order_id
         else:
             raise Exception(
                 "Order not valid, the amount_kw is below the allowed minimum or the auction is not open!"
             )
 
+    def cancel_order(self, order_id):
+        """Remove an order from the open auction"""
+        self._get_open_order(order_id)
+        order = self.order_container.remove_order(order_id)
+        logger.info("Auction %s: Cancelled order %s", self.id, order)
+
+    def amend_order(self, order_id, amount_kw=None, price_ct=None):
+        """Change the amount and/or the price of an order of the open auction.
+        An order keeps its position if only the amount is changed, with a
+        new price it is placed behind the orders of the same price."""
+        order = self._get_open_order(order_id)
+        if amount_kw is not None:
+            amount_kw = [float(amount) for amount in amount_kw]
+            if len(amount_kw) != len(order.agents) or not self._is_valid_amount(
+                sum(amount_kw)
+            ):
+                raise Exception(
+                    "Order not valid, the amount_kw does not match the agents or is below the allowed minimum!"
+                )
+        if price_ct is not None and self._limit_price(price_ct) != order.price_ct:
+            self.order_container.remove_order(order_id)
+            order.price_ct = self._limit_price(price_ct)
+            if amount_kw is not None:
+                order.amount_kw = amount_kw
+                order.total_kw = sum(amount_kw)
+            self.order_container.add_order(order)
+        elif amount_kw is not None:
+            self.order_container.update_amount(order_id, amount_kw)
+        logger.info("Auction %s: Amended order %s", self.id, order)
+
+    def _get_open_order(self, order_id) -> OrderRecord:
+        order = self.order_container.get_order(order_id)
+        if order is None:
+            raise KeyError(order_id)
+        if self.status != "open":
+            raise Exception("Order can not be changed, the auction is not open!")
+        return order
+
+    def _limit_price(self, price_ct):
+        # limit order price
+        return float(min(price_ct, self.params.maximum_price_ct))
+
+    def _is_valid_amount(self, total_kw):
+        return self.status == "open" and total_kw >= self.params.minimum_order_amount_kw
+
+    def next_status_change_time(self, current_time):
+        for change_time in (
+            self.params.gate_opening_time,
+            self.params.gate_closure_time,
+            self.params.supply_start_time + self.params.supply_duration_s,
+        ):
+            if change_time > current_time:
+                return change_time
+        return None
+
     def update_status(self, current_time):
         if current_time is None:
             self.status = "pending"
@@ -132,46 +392,27 @@ class ElectricityAskAuction(Auction):
             self.status = "pending"
 
     def clear(self):
-        # sort orders by price
-        self.order_container.orders.sort(key=lambda x: x.price_ct)
-        # find awarded orders
-        awarded_orders = []
-        total_awarded_amount = 0
-        for order in self.order_container.orders:
-            if (
-                total_awarded_amount + sum(order.amount_kw)
-                < self.params.tender_amount_kw
-            ):
-                awarded_orders.append(
-                    AwardedOrder(
-                        auction_id=order.auction_id,
-                        amount_kw=order.amount_kw,
-                        price_ct=order.price_ct,
-                        agents=order.agents,
-                        awarded_amount_kw=order.amount_kw,
-                    )
-                )
-                total_awarded_amount += sum(order.amount_kw)
-            else:
-                remaining = self.params.tender_amount_kw - total_awarded_amount
-                awarded_orders.append(
-                    AwardedOrder(
-                        auction_id=order.auction_id,
-                        amount_kw=order.amount_kw,
-                        price_ct=order.price_ct,
-                        agents=order.agents,
-                        awarded_amount_kw=[
-                            amount_kw / sum(order.amount_kw) * remaining
-                            for amount_kw in order.amount_kw
-                        ],
-                    )
+        # the order container is already sorted by price
+        orders, prices_ct, total_amounts_kw = self.order_container.to_columns()
+        clearing = clear_merit_order(
+            prices_ct, total_amounts_kw, self.params.tender_amount_kw
+        )
+        # only build result objects for awarded orders
+        awarded_orders = [
+            order.to_awarded_order(awarded_amount_kw=order.amount_kw)
+            for order in orders[: clearing.marginal_index]
+        ]
+        if clearing.marginal_remaining_kw is not None:
+            order = orders[clearing.marginal_index]
+            awarded_orders.append(
+                order.to_awarded_order(
+                    awarded_amount_kw=[
+                        amount_kw / order.total_kw * clearing.marginal_remaining_kw
+                        for amount_kw in order.amount_kw
+                    ]
                 )
-                break
-        # find clearing price
-        if len(awarded_orders) == 0:
-            clearing_price = None
-        else:
-            clearing_price = awarded_orders[-1].price_ct
+            )
+        clearing_price = clearing.clearing_price
 
         # store result
         self.result = AuctionResult(
@@ -180,6 +421,7 @@ class ElectricityAskAuction(Auction):
             clearing_price=clearing_price,
             awarded_orders=awarded_orders,
         )
+        self.result.index_agent_awards()
         return self.result
 
     def to_dict(self):
@@ -0,0 +1,53 @@
+from dataclasses import dataclass
+from typing import Optional
+import numpy as np
+
+
+@dataclass
+class MeritOrderClearing:
+    """Outcome of a merit order clearing on columnar order data.
+
+    Orders before ``marginal_index`` are awarded completely. If
+    ``marginal_remaining_kw`` is not None, the order at ``marginal_index``
+    is awarded pro-rata with this amount, all following orders are not
+    awarded."""
+
+    marginal_index: int
+    marginal_remaining_kw: Optional[float]
+    clearing_price: Optional[float]
+
+    @property
+    def n_awarded(self):
+        if self.marginal_remaining_kw is None:
+            return self.marginal_index
+        return self.marginal_index + 1
+
+
+def clear_merit_order(
+    prices_ct: np.ndarray, total_amounts_kw: np.ndarray, tender_amount_kw: float
+) -> MeritOrderClearing:
+    """Clear orders sorted by price (ascending) against a tender amount.
+
+    :param prices_ct: price of every order, sorted ascending
+    :param total_amounts_kw: total (positive) amount of every order
+    :param tender_amount_kw: amount which shall be awarded
+    """
+    n_orders = len(prices_ct)
+    if n_orders == 0:
+        return MeritOrderClearing(0, None, None)
+
+    cumulative_kw = np.cumsum(total_amounts_kw)
+    # first order which reaches the tender amount is the marginal order
+    marginal_index = int(np.searchsorted(cumulative_kw, tender_amount_kw, side="left"))
+    if marginal_index == n_orders:
+        # all orders are awarded completely
+        return MeritOrderClearing(n_orders, None, float(prices_ct[-1]))
+
+    awarded_before_kw = 0
+    if marginal_index > 0:
+        awarded_before_kw = float(cumulative_kw[marginal_index - 1])
+    return MeritOrderClearing(
+        marginal_index,
+        tender_amount_kw - awarded_before_kw,
+        float(prices_ct[marginal_index]),
+    )
@@ -1,4 +1,11 @@
+from typing import Optional
+from array import array
+import heapq
+import itertools
+import math
 from pysimmods.model.inputs import ModelInputs
+from .archive import AuctionArchive
+from .auction import auction_id_of_order
 
 
 class MarketInputs(ModelInputs):
@@ -7,6 +14,10 @@ class MarketInputs(ModelInputs):
     """
 
 
+class OrderAccessException(Exception):
+    """Raised if an agent tries to change an order it is not part of"""
+
+
 class Market:
     """
     Needed functionality:
@@ -19,40 +30,165 @@ class Market:
     - check if order fits to auction, otherwise return error
     """
 
-    def __init__(self):
+    def __init__(
+        self,
+        max_expired_auctions: Optional[int] = None,
+        archive: Optional[AuctionArchive] = None,
+    ):
+        """
+        :param max_expired_auctions: Number of expired auctions kept in memory,
+            older ones are spilled to the archive (None keeps all)
+        :param archive: Archive for expired auctions exceeding the limit
+        """
         self.inputs: MarketInputs = MarketInputs()
+        self.max_expired_auctions = max_expired_auctions
+        self.archive = archive
+        # version counters, increased when the market views change (step) and
+        # when an order has been accepted
+        self.step_count = 0
+        self.order_sequence = 0
         self.create_empty_attributes()
 
     def create_empty_attributes(self):
         self.auctions = {}
+        # (supply_start_time, product_type) -> auction, used to route orders
+        self.auction_index = {}
+        # min-heap of (next status change time, sequence, auction id)
+        self._schedule = []
+        self._schedule_sequence = itertools.count()
+        # views of open and closed auctions by auction id, the lists
+        # open_auctions and current_auction_results are derived from them
+        self._open = {}
+        self._closed = {}
         self.open_auctions = []
         self.current_auction_results = []
         self.expired_auctions = []
+        # append-only series of clearing prices of expired auctions (nan if
+        # an auction has no clearing price)
+        self.price_history = array("d")
 
     def step(self):
         current_time = self.inputs.now_dt
 
-        # Update auction data
-        self.open_auctions = []
-        self.current_auction_results = []
-        # copy to avoid changing dict during iteration
-        auctions = self.auctions.copy()
-        for auction_id, auction in auctions.items():
-            # step auctions
+        # only step auctions whose status changes until now
+        due_auctions = []
+        while self._schedule and self._schedule[0][0] <= current_time:
+            _, _, auction_id = heapq.heappop(self._schedule)
+            if auction_id in self.auctions:
+                due_auctions.append(self.auctions[auction_id])
+
+        open_changed = False
+        closed_changed = False
+        for auction in due_auctions:
             auction.step(current_time)
-            if auction.status == "open":
-                self.open_auctions.append(auction)
-            elif auction.status == "closed":
-                self.current_auction_results.append(auction.result)
+            # update views
+            if auction.id in self._open and auction.status != "open":
+                del self._open[auction.id]
+                open_changed = True
+            if auction.id in self._closed and auction.status != "closed":
+                del self._closed[auction.id]
+                closed_changed = True
+            if auction.status == "open" and auction.id not in self._open:
+                self._open[auction.id] = auction
+                open_changed = True
+            elif auction.status == "closed" and auction.id not in self._closed:
+                self._closed[auction.id] = auction.result
+                closed_changed = True
             elif auction.status == "expired":
                 self.expired_auctions.append(auction)
-                del self.auctions[auction_id]
+                self.price_history.append(self._clearing_price_value(auction.result))
+                del self.auctions[auction.id]
+                self._remove_from_auction_index(auction)
+                continue
+            self._schedule_auction(
+                auction, auction.next_status_change_time(current_time)
+            )
+
+        if open_changed:
+            self.open_auctions = list(self._open.values())
+        if closed_changed:
+            self.current_auction_results = list(self._closed.values())
+        self._apply_expired_retention()
+        self.step_count += 1
+
+    def _schedule_auction(self, auction, change_time):
+        if change_time is not None:
+            heapq.heappush(
+                self._schedule, (change_time, next(self._schedule_sequence), auction.id)
+            )
+
+    def rebuild_schedule(self):
+        """
+        Rebuilds the schedule and the views of open and closed auctions from
+        self.auctions, e.g. after loading. All auctions are stepped at the
+        next step. The routing index is rebuilt as well.
+        """
+        self.rebuild_auction_index()
+        self._schedule = []
+        self._open = {
+            auction.id: auction
+            for auction in self.auctions.values()
+            if auction.status == "open"
+        }
+        self._closed = {
+            auction.id: auction.result
+            for auction in self.auctions.values()
+            if auction.status == "closed"
+        }
+        self.open_auctions = list(self._open.values())
+        self.current_auction_results = list(self._closed.values())
+        for auction in self.auctions.values():
+            self._schedule_auction(auction, -math.inf)
+
+    @staticmethod
+    def _clearing_price_value(result):
+        if result is None or result.clearing_price is None:
+            return math.nan
+        return result.clearing_price
+
+    def _apply_expired_retention(self):
+        if self.max_expired_auctions is None:
+            return
+        n_spilled = len(self.expired_auctions) - self.max_expired_auctions
+        if n_spilled <= 0:
+            return
+        if self.archive is not None:
+            for auction in self.expired_auctions[:n_spilled]:
+                self.archive.append(auction)
+        del self.expired_auctions[:n_spilled]
 
     def receive_auction(self, new_auction):
         """
         Receives auctions
         """
         self.auctions[new_auction.id] = new_auction
+        # the first received auction for a supply time and product type wins
+        self.auction_index.setdefault(self._index_key(new_auction), new_auction)
+        # step the new auction at the next step
+        self._schedule_auction(new_auction, -math.inf)
+
+    def rebuild_auction_index(self):
+        """
+        Rebuilds the routing index from self.auctions, e.g. after loading
+        """
+        self.auction_index = {}
+        for auction in self.auctions.values():
+            self.auction_index.setdefault(self._index_key(auction), auction)
+
+    @staticmethod
+    def _index_key(auction):
+        return auction.params.supply_start_time, auction.params.product_type
+
+    def _remove_from_auction_index(self, auction):
+        key = self._index_key(auction)
+        if self.auction_index.get(key) is not auction:
+            return
+        del self.auction_index[key]
+        # route to the next remaining auction with the same key, if any
+        for other in self.auctions.values():
+            if self._index_key(other) == key:
+                self.auction_index[key] = other
+                break
 
     # method to return open auctions as a list of dicts
     def get_open_auctions(self):
@@ -71,24 +207,124 @@ class Market:
             for result in self.current_auction_results
         }
 
+    def rebuild_price_history(self):
+        """
+        Rebuilds the price history from the archive and the expired auctions
+        in memory, e.g. after loading
+        """
+        self.price_history = array("d")
+        if self.archive is not None:
+            for archived in self.archive.read():
+                self.price_history.append(self._clearing_price_value(archived.result))
+        for auction in self.expired_auctions:
+            self.price_history.append(self._clearing_price_value(auction.result))
+
+    def get_price_history(self, offset=0, limit=None):
+        """
+        Returns the clearing prices of the expired auctions in the order of
+        their expiry, starting at position offset (None if an auction had
+        no clearing price)
+        """
+        return [
+            None if math.isnan(price) else price
+            for price in self.get_price_history_array(offset, limit)
+        ]
+
+    def get_price_history_array(self, offset=0, limit=None):
+        """
+        Returns the clearing prices like get_price_history as array of
+        doubles (nan if an auction had no clearing price)
+        """
+        if limit is None:
+            return self.price_history[offset:]
+        return self.price_history[offset : offset + limit]
+
     # method to receive orders and map them to auctions
     def receive_order(
         self, amount_kw, price_ct, agents, supply_time, product_type, auction_id=None
     ):
         """
-        Receives orders and maps them to auctions
+        Receives orders and maps them to auctions, returns the order id
+        (None if there is no matching auction)
         """
         if auction_id is None:
             auction_id = self._get_auction_id_from_supply_time_and_product_type(
                 supply_time, product_type
             )
         if auction_id is not None:
-            self.auctions[auction_id].place_order(
+            order_id = self.auctions[auction_id].place_order(
                 amount_kw=amount_kw, price_ct=price_ct, agents=agents
             )
-            return True
+            self.order_sequence += 1
+            return order_id
         else:
+            return None
+
+    def receive_orders(self, orders):
+        """
+        Receives several orders and maps them to auctions, every auction is
+        looked up once. Each order is a dict with the keyword arguments of
+        receive_order (without auction_id). Returns a list with a tuple
+        (order id, error message) per order, the order id is None if the
+        order has been rejected, the error message if it has been accepted.
+        """
+        auctions_by_key = {}
+        results = []
+        for order in orders:
+            key = (order["supply_time"], order["product_type"])
+            if key not in auctions_by_key:
+                auctions_by_key[key] = self.auction_index.get(key)
+            auction = auctions_by_key[key]
+            if auction is None:
+                results.append((None, "The specified auction does not exist!"))
+                continue
+            try:
+                order_id = auction.place_order(
+                    amount_kw=order["amount_kw"],
+                    price_ct=order["price_ct"],
+                    agents=order["agents"],
+                )
+            except Exception as e:
+                results.append((None, str(e)))
+                continue
+            self.order_sequence += 1
+            results.append((order_id, None))
+        return results
+
+    def cancel_order(self, order_id, agent):
+        """
+        Cancels an order the agent is part of, returns False if the order
+        does not exist
+        """
+        auction = self._get_auction_of_order(order_id, agent)
+        if auction is None:
             return False
+        auction.cancel_order(order_id)
+        self.order_sequence += 1
+        return True
+
+    def amend_order(self, order_id, agent, amount_kw=None, price_ct=None):
+        """
+        Changes the amount and/or price of an order the agent is part of,
+        returns False if the order does not exist
+        """
+        auction = self._get_auction_of_order(order_id, agent)
+        if auction is None:
+            return False
+        auction.amend_order(order_id, amount_kw=amount_kw, price_ct=price_ct)
+        self.order_sequence += 1
+        return True
+
+    def _get_auction_of_order(self, order_id, agent):
+        auction = self.auctions.get(auction_id_of_order(order_id))
+        if auction is None:
+            return None
+        order = auction.order_container.get_order(order_id)
+        if order is None:
+            return None
+        if agent not in order.agents:
+            raise OrderAccessException("The order does not belong to the agent!")
+        return auction
 
     def _get_supply_time_and_product_type_from_auction_id(self, auction_id):
         """
@@ -111,13 +347,13 @@ class Market:
         Translates the supply time and product type of auction
         to key within self.auctions
         """
-        for auction_id, auction in self.auctions.items():
-            if (
-                auction.params.supply_start_time == supply_time
-                and auction.params.product_type == product_type
-            ):
-                return auction_id
-        return None
+        auction = self.auction_index.get((supply_time, product_type))
+        if auction is None:
+            return None
+        return auction.id
 
     def reset(self):
         self.create_empty_attributes()
+        self.step_count += 1
+        if self.archive is not None:
+            self.archive.clear()
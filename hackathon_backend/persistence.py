@@ -1,8 +1,12 @@
-from typing import List, Dict, Optional
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import List, Dict, Optional, Tuple
 import json
+import os
+import pandas as pd
 from abc import abstractmethod, ABC
 from pydantic import BaseModel
-from hackathon_backend.controller import Controller
+from hackathon_backend.controller import Controller, create_market
 from hackathon_backend.config import Config
 from hackathon_backend.market.auction import (
     Auction,
@@ -11,6 +15,7 @@ from hackathon_backend.market.auction import (
     AuctionParameters,
     Order,
     OrderContainer,
+    OrderRecord,
 )
 from hackathon_backend.accounting.account import AccountData
 
@@ -22,7 +27,6 @@ from hackathon_backend.units.load import SimpleDemandUnit, DemandInformation
 from hackathon_backend.accounting.account import (
     AccountData,
     to_actor_accounts,
-    to_actor_account_datas,
 )
 
 
@@ -41,6 +45,7 @@ class AuctionData(BaseModel):
     params: AuctionParameters
     result: Optional[AuctionResult]
     orders: List[Order]
+    order_count: int = 0
 
 
 class MarketData(BaseModel):
@@ -48,6 +53,7 @@ class MarketData(BaseModel):
     open_auctions: List[AuctionData]
     expired_auctions: List[AuctionData]
     current_auction_results: List[AuctionResult]
+    archived_auctions: int = 0
 
 
 class UnitPoolData(BaseModel):
@@ -72,6 +78,7 @@ def _to_unit(unit_information: Dict):
         ]
         for unit in sub_units:
             vpp.add_unit(unit)
+        return vpp
     elif "soc_percent" in unit_information:
         return MidasBatteryUnit(BatteryInformation(**unit_information))
     elif "a_m2" in unit_information:
@@ -87,16 +94,55 @@ def _to_actor_unit_root(id_to_unit_information_root: str):
     return _to_unit(unit_root_dict)
 
 
-def to_auction_data(auction: ElectricityAskAuction):
-    return AuctionData(
-        id=auction.id,
+@dataclass(frozen=True)
+class AuctionRefs:
+    """The parts of an auction, which change while it is open."""
+
+    auction: Auction
+    status: str
+    result: Optional[AuctionResult]
+    order_count: int
+    # amending an order replaces the amounts and the price of its record
+    orders: Tuple[Tuple[OrderRecord, List[float], float], ...]
+
+
+def to_auction_refs(auction: Auction) -> AuctionRefs:
+    return AuctionRefs(
+        auction=auction,
         status=auction.status,
-        params=auction.params,
         result=auction.result,
-        orders=auction.order_container.orders,
+        order_count=auction.order_count,
+        orders=tuple(
+            (order, order.amount_kw, order.price_ct)
+            for order in auction.order_container
+        ),
     )
 
 
+def _refs_to_auction_data(refs: AuctionRefs) -> AuctionData:
+    return AuctionData(
+        id=refs.auction.id,
+        status=refs.status,
+        params=refs.auction.params,
+        result=refs.result,
+        orders=[
+            Order(
+                agents=order.agents,
+                amount_kw=amount_kw,
+                price_ct=price_ct,
+                auction_id=order.auction_id,
+                order_id=order.order_id,
+            )
+            for order, amount_kw, price_ct in refs.orders
+        ],
+        order_count=refs.order_count,
+    )
+
+
+def to_auction_data(auction: ElectricityAskAuction):
+    return _refs_to_auction_data(to_auction_refs(auction))
+
+
 def to_auction_data_dict(auction_data_dict: Dict[str, Auction]):
     return {id: to_auction_data(auction) for id, auction in auction_data_dict.items()}
 
@@ -107,11 +153,13 @@ def to_auction_data_list(auctions: List[Auction]):
 
 def from_auction_data(auction_data: AuctionData):
     auction = ElectricityAskAuction(auction_data.params)
+    auction.id = auction_data.id
     container = OrderContainer()
-    container.orders = auction_data.orders
+    container.orders = [OrderRecord.from_order(order) for order in auction_data.orders]
     auction.order_container = container
+    auction.order_count = auction_data.order_count
     auction.status = auction_data.status
-    auction.result = auction.result
+    auction.result = auction_data.result
     return auction
 
 
@@ -123,29 +171,95 @@ def from_auction_data_list(auction_data_list: List[AuctionData]):
     return [from_auction_data(auction_data) for auction_data in auction_data_list]
 
 
-def _as_state(controller: Controller) -> ControllerData:
-    return ControllerData(
-        registered=controller.registered,
+@dataclass(frozen=True)
+class ControllerRefs:
+    """References to the state of a controller, taken on the event loop
+    between two steps. Only what is changed in place later is copied
+    (shallowly), the ControllerData is built from it in another thread by
+    to_state."""
+
+    registered: Tuple[str, ...]
+    config: Config
+    step: int
+    auctions: Dict[str, AuctionRefs]
+    open_auction_ids: Tuple[str, ...]
+    # expired auctions do not change anymore
+    expired_auctions: Tuple[Auction, ...]
+    current_auction_results: Tuple[AuctionResult, ...]
+    archived_auctions: int
+    # new transactions replace the data frame of an account
+    transactions: Dict[str, pd.DataFrame]
+    # full unit information by actor, read in the step thread before the
+    # next step
+    unit_information: Future
+
+
+def capture_state(controller: Controller) -> ControllerRefs:
+    market = controller.market
+    return ControllerRefs(
+        registered=tuple(controller.registered),
         config=controller.config,
+        step=controller.step,
+        auctions={
+            id: to_auction_refs(auction) for id, auction in market.auctions.items()
+        },
+        open_auction_ids=tuple(auction.id for auction in market.open_auctions),
+        expired_auctions=tuple(market.expired_auctions),
+        current_auction_results=tuple(market.current_auction_results),
+        archived_auctions=len(market.archive),
+        transactions={
+            k: account.transactions for k, account in controller.actor_accounts.items()
+        },
+        unit_information=controller.submit_step_work(
+            controller.unit_pool.read_full_information
+        ),
+    )
+
+
+def to_state(refs: ControllerRefs) -> ControllerData:
+    auctions = {
+        id: _refs_to_auction_data(auction_refs)
+        for id, auction_refs in refs.auctions.items()
+    }
+    return ControllerData(
+        registered=list(refs.registered),
+        config=refs.config,
         market=MarketData(
-            auctions=to_auction_data_dict(controller.market.auctions),
-            open_auctions=to_auction_data_list(controller.market.open_auctions),
-            expired_auctions=to_auction_data_list(controller.market.expired_auctions),
-            current_auction_results=controller.market.current_auction_results,
+            auctions=auctions,
+            open_auctions=[auctions[id] for id in refs.open_auction_ids],
+            expired_auctions=to_auction_data_list(refs.expired_auctions),
+            current_auction_results=list(refs.current_auction_results),
+            archived_auctions=refs.archived_auctions,
         ),
         unit_pool=UnitPoolData(
             actor_to_root_payload={
-                k: v.read_full_information().model_dump_json(serialize_as_any=True)
-                for k, v in controller.unit_pool.actor_to_root.items()
+                k: v.model_dump_json(serialize_as_any=True)
+                for k, v in refs.unit_information.result().items()
             }
         ),
-        step=controller.step,
-        actor_account_data=to_actor_account_datas(controller.actor_accounts),
+        step=refs.step,
+        actor_account_data={
+            k: AccountData(transaction_payload=transactions.to_json())
+            for k, transactions in refs.transactions.items()
+        },
     )
 
 
-def _load_state(controller_data: ControllerData) -> Controller:
-    controller = Controller()
+def _as_state(controller: Controller) -> ControllerData:
+    return to_state(capture_state(controller))
+
+
+def _load_state(
+    controller_data: ControllerData, controller_factory=Controller
+) -> Controller:
+    controller = controller_factory()
+    # the config file stays authoritative, the persisted config is not pushed
+    controller.config_provider.refresh()
+    controller.market = create_market(
+        controller.config,
+        archived_auctions=controller_data.market.archived_auctions,
+        state_dir=controller.state_dir,
+    )
     controller.step = controller_data.step
     controller.actor_accounts = to_actor_accounts(controller_data.actor_account_data)
     controller.unit_pool.actor_to_root = {
@@ -153,28 +267,39 @@ def _load_state(controller_data: ControllerData) -> Controller:
         for k, v in controller_data.unit_pool.actor_to_root_payload.items()
     }
     controller.market.auctions = from_auction_data_dict(controller_data.market.auctions)
-    controller.market.open_auctions = from_auction_data_list(
-        controller_data.market.open_auctions
-    )
+    controller.market.rebuild_schedule()
     controller.market.expired_auctions = from_auction_data_list(
         controller_data.market.expired_auctions
     )
-    controller.market.current_auction_results = (
-        controller_data.market.current_auction_results
-    )
-    controller.config = controller_data.config
+    controller.market.rebuild_price_history()
     controller.registered = controller_data.registered
+    controller.publish_snapshot()
     return controller
 
 
 class JsonPersistenceHandler:
 
-    def __init__(self, default_fp) -> None:
+    def __init__(self, default_fp, controller_factory=Controller) -> None:
         self.fp = default_fp
+        self.controller_factory = controller_factory
 
     def write(self, controller):
         self._write(controller, self.fp)
 
+    def snapshot(self, controller) -> ControllerRefs:
+        """Consistent references to the state of the controller, cheap to
+        take on the event loop. write_snapshot converts and writes them in
+        another thread."""
+        return capture_state(controller)
+
+    def write_snapshot(self, refs: ControllerRefs):
+        controller_data = to_state(refs)
+        # replace the file at once, it may be loaded while it is written
+        tmp_fp = f"{self.fp}.tmp"
+        with open(tmp_fp, "w+") as f:
+            f.write(controller_data.model_dump_json())
+        os.replace(tmp_fp, self.fp)
+
     def load(
         self,
     ):
@@ -187,4 +312,7 @@ class JsonPersistenceHandler:
     def _load(self, json_file) -> Controller:
         with open(json_file) as jfp:
             json_data = jfp.read()
-            return _load_state(ControllerData.model_validate_json(json_data))
+            return _load_state(
+                ControllerData.model_validate_json(json_data),
+                controller_factory=self.controller_factory,
+            )
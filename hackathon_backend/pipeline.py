@@ -0,0 +1,61 @@
+import asyncio
+import logging
+from typing import Any, Callable
+
+logger = logging.getLogger(__name__)
+
+
+class HookWorker:
+    """Runs an after step hook in a worker thread on snapshots of the
+    controller.
+
+    The snapshot is taken on the event loop between two steps, so it is
+    consistent; only the (slow) hook itself, e.g. writing a file, runs in
+    the thread. Snapshots are queued in a bounded queue: if the hook falls
+    behind, submitting waits for a free slot (backpressure on the stepping
+    loop, not on the API)."""
+
+    def __init__(
+        self,
+        hook: Callable[[Any], None],
+        snapshot: Callable[[Any], Any],
+        queue_size: int = 1,
+    ) -> None:
+        self.hook = hook
+        self.snapshot = snapshot
+        self.queue_size = queue_size
+        self._loop = None
+        self._queue = None
+        self._task = None
+
+    def _ensure_started(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._task.done():
+            self._loop = loop
+            self._queue = asyncio.Queue(maxsize=self.queue_size)
+            self._task = loop.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            snapshot = await self._queue.get()
+            try:
+                await asyncio.to_thread(self.hook, snapshot)
+            except Exception:
+                logger.exception("The after step hook %s crashed!", self.hook)
+            finally:
+                self._queue.task_done()
+
+    async def submit(self, controller):
+        self._ensure_started()
+        await self._queue.put(self.snapshot(controller))
+
+    async def join(self):
+        """Wait until all submitted snapshots have been processed."""
+        if self._queue is not None and self._loop is asyncio.get_running_loop():
+            await self._queue.join()
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+            self._loop = None
@@ -0,0 +1,60 @@
+import time
+from typing import Dict, Tuple
+
+
+class TokenBucket:
+    __slots__ = ("tokens", "updated", "admitted", "rejected")
+
+    def __init__(self, tokens, updated) -> None:
+        self.tokens = tokens
+        self.updated = updated
+        self.admitted = 0
+        self.rejected = 0
+
+
+class RateLimiter:
+    """Token bucket rate limiter with one bucket per (budget, key), e.g. per
+    actor for reads and for orders. Every budget is configured with a refill
+    rate and a burst size when it is checked, so config changes apply
+    immediately.
+
+    At most max_buckets buckets are kept, the least recently used bucket
+    (and its counters) is evicted first."""
+
+    def __init__(self, clock=time.monotonic, max_buckets=10_000) -> None:
+        self.clock = clock
+        self.max_buckets = max_buckets
+        # in the order of their last use, least recently used first
+        self._buckets: Dict[Tuple[str, str], TokenBucket] = {}
+
+    def allow(self, budget: str, key: str, rate_per_s: float, burst: float) -> bool:
+        now = self.clock()
+        bucket = self._buckets.pop((budget, key), None)
+        if bucket is None:
+            bucket = TokenBucket(burst, now)
+            while len(self._buckets) >= self.max_buckets:
+                del self._buckets[next(iter(self._buckets))]
+        else:
+            refill = (now - bucket.updated) * rate_per_s
+            bucket.tokens = min(burst, bucket.tokens + refill)
+            bucket.updated = now
+        self._buckets[(budget, key)] = bucket
+
+        if bucket.tokens >= 1:
+            bucket.tokens -= 1
+            bucket.admitted += 1
+            return True
+        bucket.rejected += 1
+        return False
+
+    def get_counters(self):
+        counters = {}
+        for (budget, key), bucket in self._buckets.items():
+            counters.setdefault(budget, {})[key] = {
+                "admitted": bucket.admitted,
+                "rejected": bucket.rejected,
+            }
+        return counters
+
+    def reset(self):
+        self._buckets = {}
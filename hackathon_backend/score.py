@@ -11,14 +11,26 @@ def to_participant(actor, mapping):
 
 
 class CsvScoreHandler:
-    def __init__(self, time):
+    def __init__(self, time, results_dir="results/"):
         self.time = time
+        self.results_dir = Path(results_dir)
 
     def write(self, controller: Controller):
-        Path("results/").mkdir(parents=True, exist_ok=True)
-        controller.general_demand.supply.to_csv(f"results/gm_{self.time}.csv")
+        self.write_snapshot(self.snapshot(controller))
+
+    def snapshot(self, controller: Controller):
+        """Copy of the scores, which can be written by write_snapshot in
+        another thread."""
         balance_dict = {
             to_participant(k, controller.actor_to_participant): v
             for k, v in controller.get_balance_dict_sync().items()
         }
-        pd.DataFrame([balance_dict]).to_csv(f"results/agents_{self.time}.csv")
+        return controller.general_demand.supply.copy(), balance_dict
+
+    def write_snapshot(self, snapshot):
+        supply, balance_dict = snapshot
+        self.results_dir.mkdir(parents=True, exist_ok=True)
+        supply.to_csv(self.results_dir / f"gm_{self.time}.csv")
+        pd.DataFrame([balance_dict]).to_csv(
+            self.results_dir / f"agents_{self.time}.csv"
+        )
@@ -0,0 +1,77 @@
+from dataclasses import dataclass, field
+import threading
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Iterable, Mapping, Optional, Tuple
+import pandas as pd
+
+
+def _empty_mapping():
+    return MappingProxyType({})
+
+
+class LazyMapping(Mapping):
+    """Read-only mapping with fixed keys, which loads the value of a key on
+    its first access and keeps it, so every value is loaded at most once."""
+
+    def __init__(
+        self,
+        keys: Iterable,
+        load: Callable[[Any], Any],
+        values: Optional[Mapping] = None,
+    ) -> None:
+        # ordered set of the keys
+        self._keys = dict.fromkeys(keys)
+        self._load = load
+        self._values = {} if values is None else dict(values)
+        self._lock = threading.Lock()
+
+    def is_loaded(self, key) -> bool:
+        return key in self._values
+
+    def loaded(self) -> Dict:
+        """The values loaded so far."""
+        return dict(self._values)
+
+    def __getitem__(self, key):
+        if key in self._values:
+            return self._values[key]
+        if key not in self._keys:
+            raise KeyError(key)
+        with self._lock:
+            if key not in self._values:
+                self._values[key] = self._load(key)
+            return self._values[key]
+
+    def __contains__(self, key):
+        return key in self._keys
+
+    def __iter__(self):
+        return iter(self._keys)
+
+    def __len__(self):
+        return len(self._keys)
+
+
+@dataclass(frozen=True, eq=False)
+class ControllerSnapshot:
+    """Immutable state served by the read endpoints.
+
+    The controller publishes a new snapshot at the end of the market and
+    the unit phase of every step and swaps it in as a whole, so readers get
+    the latest complete state without waiting for a running step.
+    """
+
+    version: int = 0
+    # params of the open auctions
+    open_auction_params: Tuple[Any, ...] = ()
+    # results of the auctions cleared in the last market step
+    auction_results: Tuple[Any, ...] = ()
+    # results by "<supply_start_time>_<product_type>"
+    current_auction_results: Mapping[str, Any] = field(default_factory=_empty_mapping)
+    # flattened unit information by actor id, read on first access after a
+    # unit step
+    unit_information: LazyMapping = field(
+        default_factory=lambda: LazyMapping((), load=None)
+    )
+    balances: Mapping[str, float] = field(default_factory=_empty_mapping)
+    demand: Optional[pd.DataFrame] = None
@@ -1,7 +1,8 @@
 from typing import Dict
 import logging
+import weakref
 from .unit import Unit, UnitInput, UnitResult, UnitInformation
-from pysimmods.buffer.batterysim.battery import Battery
+from .fleet import BatteryFleet, default_fleet
 
 logger = logging.getLogger(__name__)
 
@@ -19,41 +20,68 @@ class BatteryUnit(Unit):
 
 
 class MidasBatteryUnit(BatteryUnit):
+    """Battery following the pysimmods battery model (without losses and a
+    minimum state of charge). The unit is a view into a BatteryFleet, which
+    holds its state and steps it."""
 
-    def __init__(self, battery_info: BatteryInformation) -> None:
+    def __init__(
+        self, battery_info: BatteryInformation, fleet: BatteryFleet = None
+    ) -> None:
         super().__init__(battery_info.unit_id)
 
-        self._midas_battery = Battery(
-            {
-                "cap_kwh": battery_info.cap_kwh,
-                "p_charge_max_kw": battery_info.p_charge_max_kw,
-                "p_discharge_max_kw": battery_info.p_discharge_max_kw,
-                "soc_min_percent": 0,
-                "eta_pc": [0, 0, 100],
-            },
-            {"soc_percent": battery_info.soc_percent},
+        self._attach(default_fleet() if fleet is None else fleet, battery_info)
+
+    def _attach(self, fleet: BatteryFleet, battery_info: BatteryInformation):
+        self._fleet = fleet
+        self._index = fleet.add(
+            cap_kwh=battery_info.cap_kwh,
+            p_charge_max_kw=battery_info.p_charge_max_kw,
+            p_discharge_max_kw=battery_info.p_discharge_max_kw,
+            soc_percent=battery_info.soc_percent,
+            soc_min_percent=0,
+            eta_pc=(0, 0, 100),
         )
+        weakref.finalize(self, fleet.remove, self._index)
+
+    def __getstate__(self):
+        # only the battery is copied, it joins the default fleet of the process
+        return {"battery_info": self.read_information()}
+
+    def __setstate__(self, state):
+        battery_info = state["battery_info"]
+        super().__init__(battery_info.unit_id)
+        self._attach(default_fleet(), battery_info)
+
+    @property
+    def fleet(self) -> BatteryFleet:
+        return self._fleet
+
+    @property
+    def index(self) -> int:
+        return self._index
+
+    @property
+    def soc_percent(self) -> float:
+        return float(self._fleet.soc_percent[self._index])
 
     def step(
         self, input: UnitInput, step: int, other_inputs: Dict[str, UnitInput] = None
     ):
         logger.info("Step Battery %s with input %s and step %s", self.id, input, step)
-        self._midas_battery.set_q_kvar(input.q_kvar)
-        self._midas_battery.set_p_kw(input.p_kw)
-        self._midas_battery.set_step_size(input.delta_t)
-        self._midas_battery.step()
+        p_kw = self._fleet.step_battery(self._index, input.p_kw, input.delta_t)
 
-        return UnitResult(
-            p_kw=self._midas_battery.get_p_kw(), q_kvar=self._midas_battery.get_q_kvar()
-        )
+        return UnitResult(p_kw=p_kw, q_kvar=0)
+
+    def step_values(self, delta_t, p_kw, q_kvar, step):
+        return self._fleet.step_battery(self._index, p_kw, delta_t), 0
 
     def read_information(self) -> UnitInformation:
         return BatteryInformation(
             unit_id=self.id,
-            soc_percent=self._midas_battery.state.soc_percent,
-            cap_kwh=self._midas_battery.config.cap_kwh,
-            p_charge_max_kw=self._midas_battery.config.p_charge_max_kw,
-            p_discharge_max_kw=self._midas_battery.config.p_discharge_max_kw,
+            soc_percent=self.soc_percent,
+            cap_kwh=float(self._fleet.cap_kwh[self._index]),
+            p_charge_max_kw=float(self._fleet.p_charge_max_kw[self._index]),
+            p_discharge_max_kw=float(self._fleet.p_discharge_max_kw[self._index]),
         )
 
     def read_full_information(self) -> UnitInformation:
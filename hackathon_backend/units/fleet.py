@@ -0,0 +1,173 @@
+import threading
+from typing import List, Sequence
+import numpy as np
+
+DEFAULT_ETA_PC = (0, 0, 100)
+
+
+class BatteryFleet:
+    """State and parameters of many batteries as struct of arrays.
+
+    Reimplements the pysimmods battery model (passive sign convention, a
+    setpoint is always given) for all batteries at once: positive power
+    charges, negative power discharges the battery. Batteries are
+    identified by their index in the arrays, freed indices are reused."""
+
+    def __init__(self, capacity=64) -> None:
+        self._lock = threading.Lock()
+        self._free: List[int] = []
+        self._size = 0
+        self.soc_percent = np.zeros(capacity)
+        self.cap_kwh = np.ones(capacity)
+        self.p_charge_max_kw = np.zeros(capacity)
+        self.p_discharge_max_kw = np.zeros(capacity)
+        self.soc_min_percent = np.zeros(capacity)
+        self.eta_pc = np.tile(np.asarray(DEFAULT_ETA_PC, dtype=float), (capacity, 1))
+        self.p_kw = np.zeros(capacity)
+
+    def __len__(self):
+        return self._size - len(self._free)
+
+    def _grow(self):
+        capacity = 2 * len(self.soc_percent)
+        for name in (
+            "soc_percent",
+            "cap_kwh",
+            "p_charge_max_kw",
+            "p_discharge_max_kw",
+            "soc_min_percent",
+            "eta_pc",
+            "p_kw",
+        ):
+            array = getattr(self, name)
+            grown = np.zeros((capacity,) + array.shape[1:])
+            grown[: len(array)] = array
+            setattr(self, name, grown)
+
+    def add(
+        self,
+        cap_kwh: float,
+        p_charge_max_kw: float,
+        p_discharge_max_kw: float,
+        soc_percent: float,
+        soc_min_percent: float = 0,
+        eta_pc: Sequence[float] = DEFAULT_ETA_PC,
+    ) -> int:
+        """Add a battery and return its index."""
+        with self._lock:
+            if self._free:
+                index = self._free.pop()
+            else:
+                if self._size == len(self.soc_percent):
+                    self._grow()
+                index = self._size
+                self._size += 1
+            self.cap_kwh[index] = abs(cap_kwh)
+            self.p_charge_max_kw[index] = abs(p_charge_max_kw)
+            self.p_discharge_max_kw[index] = abs(p_discharge_max_kw)
+            self.soc_percent[index] = soc_percent
+            self.soc_min_percent[index] = soc_min_percent
+            self.eta_pc[index] = eta_pc
+            self.p_kw[index] = 0
+        return index
+
+    def remove(self, index: int):
+        with self._lock:
+            self._free.append(index)
+
+    def step(self, indices, p_set_kw, step_size: int) -> np.ndarray:
+        """Step the batteries at the (distinct) indices with the setpoints
+        p_set_kw for step_size seconds and return their power."""
+        with self._lock:
+            indices = np.asarray(indices, dtype=np.intp)
+            p_kw = np.asarray(p_set_kw, dtype=float)
+            step_h = int(step_size) / 3600
+            cap_kwh = self.cap_kwh[indices]
+            soc_min_percent = self.soc_min_percent[indices]
+            eta_pc = self.eta_pc[indices]
+
+            p_kw = np.where(
+                p_kw < 0,
+                np.maximum(p_kw, -self.p_discharge_max_kw[indices]),
+                np.minimum(p_kw, self.p_charge_max_kw[indices]),
+            )
+            discharge = p_kw < 0
+            energy_kwh = cap_kwh * self.soc_percent[indices] / 100
+            p_set_norm = p_kw / cap_kwh
+            eta_percent = (
+                eta_pc[:, 0] * p_set_norm**2 + eta_pc[:, 1] * p_set_norm + eta_pc[:, 2]
+            )
+
+            with np.errstate(divide="ignore", invalid="ignore"):
+                delta_energy_kwh = np.where(
+                    discharge,
+                    p_kw / (eta_percent / 100) * step_h,
+                    p_kw * (eta_percent / 100) * step_h,
+                )
+                theoretical_energy_kwh = energy_kwh - cap_kwh * soc_min_percent / 100
+                empty = discharge & ~(theoretical_energy_kwh > abs(delta_energy_kwh))
+                full = ~discharge & ~((cap_kwh - energy_kwh) > delta_energy_kwh)
+                p_kw = np.where(
+                    empty,
+                    theoretical_energy_kwh / (step_h / eta_percent * -100),
+                    np.where(
+                        full,
+                        (cap_kwh - energy_kwh) / (step_h * eta_percent / 100),
+                        p_kw,
+                    ),
+                )
+            energy_kwh = np.where(
+                empty,
+                soc_min_percent / 100 * cap_kwh,
+                np.where(full, cap_kwh, energy_kwh + delta_energy_kwh),
+            )
+
+            self.soc_percent[indices] = energy_kwh / cap_kwh * 100
+            self.p_kw[indices] = p_kw
+            return p_kw
+
+    def step_battery(self, index: int, p_set_kw: float, step_size: int) -> float:
+        """Step a single battery, same as step without the array overhead."""
+        with self._lock:
+            cap_kwh = float(self.cap_kwh[index])
+            soc_min_percent = float(self.soc_min_percent[index])
+            eta_pc = self.eta_pc[index].tolist()
+            step_h = int(step_size) / 3600
+
+            if p_set_kw < 0:
+                p_kw = max(p_set_kw, -float(self.p_discharge_max_kw[index]))
+            else:
+                p_kw = min(p_set_kw, float(self.p_charge_max_kw[index]))
+            energy_kwh = cap_kwh * float(self.soc_percent[index]) / 100
+            p_set_norm = p_kw / cap_kwh
+            eta_percent = (
+                eta_pc[0] * p_set_norm**2 + eta_pc[1] * p_set_norm + eta_pc[2]
+            )
+
+            if p_kw < 0:
+                delta_energy_kwh = p_kw / (eta_percent / 100) * step_h
+                theoretical_energy_kwh = energy_kwh - cap_kwh * soc_min_percent / 100
+                if theoretical_energy_kwh > abs(delta_energy_kwh):
+                    energy_kwh += delta_energy_kwh
+                else:
+                    p_kw = theoretical_energy_kwh / (step_h / eta_percent * -100)
+                    energy_kwh = soc_min_percent / 100 * cap_kwh
+            else:
+                delta_energy_kwh = p_kw * (eta_percent / 100) * step_h
+                if (cap_kwh - energy_kwh) > delta_energy_kwh:
+                    energy_kwh += delta_energy_kwh
+                else:
+                    p_kw = (cap_kwh - energy_kwh) / (step_h * eta_percent / 100)
+                    energy_kwh = cap_kwh
+
+            self.soc_percent[index] = energy_kwh / cap_kwh * 100
+            self.p_kw[index] = p_kw
+            return p_kw
+
+
+_default_fleet = BatteryFleet()
+
+
+def default_fleet() -> BatteryFleet:
+    """Fleet of the process, which batteries are added to by default."""
+    return _default_fleet
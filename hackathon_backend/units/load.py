@@ -1,5 +1,7 @@
+import functools
 import logging
 from typing import List, Dict
+import numpy as np
 from .unit import Unit, UnitInput, UnitResult, UnitInformation
 
 N_TIME_INTERVALS = 96
@@ -20,22 +22,46 @@ class ForecastedDemandInformation(UnitInformation):
     forecast_demand_q_kvar: List[float]
 
 
+# number of distinct profiles whose arrays are cached for new demands
+PROFILE_CACHE_SIZE = 16
+
+
+@functools.lru_cache(maxsize=PROFILE_CACHE_SIZE)
+def _read_only_profile(profile: tuple) -> np.ndarray:
+    """Profile as read-only array, shared by all demands with this profile.
+    Only the recently used profiles are cached, demands keep their arrays."""
+    array = np.array(profile, dtype=float)
+    array.flags.writeable = False
+    return array
+
+
 class SimpleDemand:
-    _perfect_demand_p_kw: List[float]
-    _perfect_demand_p_kvar: List[float]
+    _perfect_demand_p_kw: np.ndarray
+    _perfect_demand_p_kvar: np.ndarray
     _uncertainty: float
 
     def __init__(
         self, p_demand_kw: List[float], q_demand_kvar: List[float], uncertainty: float
     ) -> None:
         assert len(p_demand_kw) == len(q_demand_kvar)
-        self._perfect_demand_p_kw = p_demand_kw
-        self._perfect_demand_p_kvar = q_demand_kvar
+        self._perfect_demand_p_kw = _read_only_profile(tuple(p_demand_kw))
+        self._perfect_demand_p_kvar = _read_only_profile(tuple(q_demand_kvar))
         self._uncertainty = uncertainty
 
     # TODO uncertainty
     def forecast_demand(self, step):
-        return self._perfect_demand_p_kw[step], self._perfect_demand_p_kvar[step]
+        return (
+            float(self._perfect_demand_p_kw[step]),
+            float(self._perfect_demand_p_kvar[step]),
+        )
+
+    def forecast_demand_slice(self, start_index, end_index):
+        """Forecast from start_index to end_index (exclusive) as read-only
+        views of the profiles."""
+        return (
+            self._perfect_demand_p_kw[start_index:end_index],
+            self._perfect_demand_p_kvar[start_index:end_index],
+        )
 
 
 class SimpleDemandUnit(Unit):
@@ -62,30 +88,27 @@ class SimpleDemandUnit(Unit):
         p, q = self._simple_demand.forecast_demand(step)
         return UnitResult(p_kw=p, q_kvar=q)
 
+    def step_values(self, delta_t, p_kw, q_kvar, step):
+        self.time_step = step
+        return self._simple_demand.forecast_demand(step)
+
     def read_information(self) -> UnitInformation:
         p, q = self.get_forecast(
             start_index=self.time_step,
             end_index=self.time_step + 1 + self.forecast_horizon,
         )
         return ForecastedDemandInformation(
-            unit_id=self.id, forecast_demand_p_kw=p, forecast_demand_q_kvar=q
+            unit_id=self.id,
+            forecast_demand_p_kw=p.tolist(),
+            forecast_demand_q_kvar=q.tolist(),
         )
 
     def read_full_information(self) -> UnitInformation:
         return self._internal_information
 
     def get_forecast(self, start_index, end_index):
-        # limit indices
-        start_index = min(start_index, len(self._simple_demand._perfect_demand_p_kw))
-        end_index = min(end_index, len(self._simple_demand._perfect_demand_p_kw))
-
-        p_forecast = []
-        q_forecast = []
-        for index in range(start_index, end_index):
-            p_fcast, q_fcast = self._simple_demand.forecast_demand(index)
-            p_forecast.append(p_fcast)
-            q_forecast.append(q_fcast)
-        return p_forecast, q_forecast
+        # slicing limits the indices
+        return self._simple_demand.forecast_demand_slice(start_index, end_index)
 
 
 def create_demand(id, p_profile: List, q_profile: List, uncertainty: float):
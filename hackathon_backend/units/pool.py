@@ -1,13 +1,15 @@
 from uuid import UUID, uuid4
+import functools
 from typing import Dict, List
 import math
 import logging
 
-from .unit import Unit, UnitInput, UnitInformation
-from .vpp import VPP, VPPInformation
-from .load import create_demand
+from .unit import Unit, UnitInput, UnitInformation, UnitResult
+from .vpp import VPP, VPPInformation, step_units
+from .load import DemandInformation, SimpleDemandUnit
 from .battery import create_battery
-from .pv import create_pv_unit
+from .pv import MidasPVUnit, PVInformation
+from .workers import UnitWorkers
 
 
 logger = logging.getLogger(__name__)
@@ -28,12 +30,58 @@ def _flatten_unit_information(unit_information):
 class UnitPool:
     """Container to store units which are organized in a tree structure.
     They belong to actors identified by UUIDs and their information is
-    returned as a list of unit information."""
+    returned as a list of unit information.
 
-    actor_to_root: Dict[str, Unit]
+    With attached workers, the unit trees are owned and stepped by worker
+    processes. The trees of the pool are then copies, which are fetched
+    from the workers when they are accessed after a step."""
 
     def __init__(self) -> None:
-        self.actor_to_root = {}
+        self._actor_to_root: Dict[str, Unit] = {}
+        self._workers: UnitWorkers = None
+        self._stale_actors = set()
+
+    @property
+    def actor_to_root(self) -> Dict[str, Unit]:
+        self._sync(self._stale_actors)
+        return self._actor_to_root
+
+    @actor_to_root.setter
+    def actor_to_root(self, actor_to_root: Dict[str, Unit]):
+        self._actor_to_root = actor_to_root
+        self._stale_actors = set()
+        if self._workers is not None:
+            for actor, unit_root in actor_to_root.items():
+                self._workers.insert(actor, unit_root)
+
+    def _sync(self, actors):
+        stale_actors = [actor for actor in actors if actor in self._stale_actors]
+        if stale_actors:
+            self._actor_to_root.update(self._workers.fetch(stale_actors))
+            self._stale_actors.difference_update(stale_actors)
+
+    def attach_workers(self, workers: UnitWorkers):
+        """Move the unit trees to the worker processes, which step them from
+        now on."""
+        self.detach_workers()
+        self._workers = workers
+        for actor, unit_root in self._actor_to_root.items():
+            workers.insert(actor, unit_root)
+
+    def detach_workers(self):
+        """Fetch the unit trees from the workers and close them."""
+        if self._workers is None:
+            return
+        self._sync(list(self._stale_actors))
+        self._workers.close()
+        self._workers = None
+
+    @property
+    def n_workers(self):
+        return 0 if self._workers is None else self._workers.n_workers
+
+    def actors(self) -> List[str]:
+        return list(self._actor_to_root.keys())
 
     def step_actor(
         self,
@@ -43,28 +91,101 @@ class UnitPool:
         other_inputs: Dict[str, UnitInput] = None,
     ):
         logger.info("Step actor %s...", uuid)
-        return self.actor_to_root[uuid].step(input, step, other_inputs=other_inputs)
+        if self._workers is not None:
+            return self.step_actors({uuid: input}, step)[uuid]
+        return self._actor_to_root[uuid].step(input, step, other_inputs=other_inputs)
+
+    def step_actors(
+        self, inputs: Dict[str, UnitInput], step: int
+    ) -> Dict[str, UnitResult]:
+        """Step the unit trees of several actors together (see step_units),
+        in parallel if workers are attached. The results are returned in the
+        order of the inputs."""
+        if self._workers is None:
+            logger.info("Step %s actors...", len(inputs))
+            results = step_units(
+                [self._actor_to_root[actor_id] for actor_id in inputs.keys()],
+                list(inputs.values()),
+                step,
+            )
+            return dict(zip(inputs.keys(), results))
+        results = self._workers.step(inputs, step)
+        self._stale_actors.update(inputs.keys())
+        return results
 
     def insert_actor_root(self, actor: str, unit_root: Unit):
-        self.actor_to_root[actor] = unit_root
+        self._actor_to_root[actor] = unit_root
+        self._stale_actors.discard(actor)
+        if self._workers is not None:
+            self._workers.insert(actor, unit_root)
 
     def has_actor(self, actor_id: str):
-        return actor_id in self.actor_to_root
+        return actor_id in self._actor_to_root
+
+    def read_all_units(
+        self, actors: List[str] = None
+    ) -> Dict[str, List[UnitInformation]]:
+        """Read the flattened unit information of several actors (default:
+        all), in the worker processes if workers are attached."""
+        if actors is None:
+            actors = self.actors()
+        if self._workers is not None:
+            stale_actors = [actor for actor in actors if actor in self._stale_actors]
+            unit_information = self._workers.read(stale_actors)
+        else:
+            unit_information = {}
+        return {
+            actor: _flatten_unit_information(
+                unit_information[actor]
+                if actor in unit_information
+                else self._actor_to_root[actor].read_information()
+            )
+            for actor in actors
+        }
+
+    def read_full_information(
+        self, actors: List[str] = None
+    ) -> Dict[str, UnitInformation]:
+        """Read the full information of the unit trees of several actors
+        (default: all), which restores them. With workers attached, it is
+        read in the worker processes instead of fetching the trees."""
+        if actors is None:
+            actors = self.actors()
+        if self._workers is not None:
+            stale_actors = [actor for actor in actors if actor in self._stale_actors]
+            full_information = self._workers.read(stale_actors, full=True)
+        else:
+            full_information = {}
+        return {
+            actor: (
+                full_information[actor]
+                if actor in full_information
+                else self._actor_to_root[actor].read_full_information()
+            )
+            for actor in actors
+        }
 
     def read_units(self, actor: str) -> List[UnitInformation]:
         """Initiate reading of unit information and flatten it."""
-        root = self.actor_to_root[actor]
+        self._sync([actor])
+        root = self._actor_to_root[actor]
         unit_information = root.read_information()
         return _flatten_unit_information(unit_information)
 
 
-def allocate_default_actor_units(demand_size=1):
-    new_actor_id = uuid4()
-    root_vpp = VPP()
+@functools.lru_cache(maxsize=None)
+def _default_unit_information(demand_size):
+    """Information of the default units, created once and shared by the unit
+    trees of all actors (and competitions), which only read it."""
     # Load
     p_profile_day = [demand_size for _ in range(96)]
     q_profile_day = [demand_size / 2 for _ in range(96)]
-    root_vpp.add_unit(create_demand("d0", p_profile_day, q_profile_day, 1))
+    demand_information = DemandInformation(
+        unit_id="d0",
+        perfect_demand_p_kw=p_profile_day,
+        perfect_demand_q_kvar=q_profile_day,
+        uncertainty=1,
+    )
     # PV
     # full cosine profile over N time intervals
     n_intervals = 96
@@ -72,9 +193,22 @@ def allocate_default_actor_units(demand_size=1):
     # create irradiance profile from cosine values
     pv_profile_day = [1000 * (1 - s) / 2 for s in cos_values]
     p_pv_peak = 3.0
-    root_vpp.add_unit(
-        create_pv_unit("pb0", pv_profile_day, a_m2=4 * p_pv_peak, eta_percent=25)
+    pv_information = PVInformation(
+        unit_id="pb0",
+        pv_p_kw=pv_profile_day,
+        a_m2=4 * p_pv_peak,
+        eta_percent=25,
+        t_module_deg_celsius=25,
     )
+    return demand_information, pv_information
+
+
+def allocate_default_actor_units(demand_size=1):
+    new_actor_id = uuid4()
+    root_vpp = VPP()
+    demand_information, pv_information = _default_unit_information(demand_size)
+    root_vpp.add_unit(SimpleDemandUnit(demand_information))
+    root_vpp.add_unit(MidasPVUnit(pv_information))
     # Battery
     root_vpp.add_unit(create_battery("b0"))
     return str(new_actor_id), root_vpp
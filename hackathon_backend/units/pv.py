@@ -1,5 +1,7 @@
-from typing import List, Dict
+from typing import List, Dict, Optional
+import functools
 import random
+import numpy as np
 from .unit import Unit, UnitInput, UnitResult, UnitInformation
 from pysimmods.generator.pvsim import PhotovoltaicPowerPlant
 import datetime
@@ -10,6 +12,10 @@ N_TIME_INTERVALS = 96
 # Profile typically between 0 and 1000 in Germany (w_per_m2):
 DEFAULT_PV_PROFILE = [1000 for _ in range(N_TIME_INTERVALS)]
 DEFAULT_CONST_TEMP = 20
+# step size the output of the profile is precomputed for (in seconds)
+PRECOMPUTED_STEP_SIZE = 15 * 60
+# number of distinct plants whose precomputed output is cached for new units
+PRECOMPUTED_CACHE_SIZE = 16
 
 logger = logging.getLogger(__name__)
 
@@ -19,27 +25,103 @@ class PVInformation(UnitInformation):
     a_m2: float
     eta_percent: float
     t_module_deg_celsius: float
+    forecast_seed: Optional[int] = None
 
 
 class PVForecastInformation(UnitInformation):
     forecast_pv_p_kw: List[float]
 
 
+def _create_midas_pp(a_m2, eta_percent, t_module_deg_celsius):
+    return PhotovoltaicPowerPlant(
+        {
+            "a_m2": a_m2,
+            "eta_percent": eta_percent,
+            "is_static_t_module": True,
+        },
+        {"t_module_deg_celsius": t_module_deg_celsius},
+    )
+
+
+def _step_midas_pp(midas_pp, profile, input: UnitInput, step: int):
+    midas_pp.set_p_kw(input.p_kw)  # not needed for pvsim (only for pvsystemsim)
+    midas_pp.set_q_kvar(input.q_kvar)  # not needed for pvsim (only for pvsystemsim)
+    midas_pp.set_step_size(input.delta_t)
+    midas_pp.inputs.bh_w_per_m2 = (
+        0  # if not 0, midas applies lat/long based irradiance model
+    )
+    midas_pp.inputs.dh_w_per_m2 = profile[step]
+    midas_pp.inputs.t_air_deg_celsius = DEFAULT_CONST_TEMP
+    midas_pp.inputs.now_dt = datetime.datetime(
+        2000, 1, 1, step // 4, (step * 15) % 60, 0, 0
+    )
+    midas_pp.step()
+
+
+@functools.lru_cache(maxsize=PRECOMPUTED_CACHE_SIZE)
+def _precompute_pv_power(profile, a_m2, eta_percent, t_module_deg_celsius):
+    """Output of the pysimmods PV model for every step of the profile.
+
+    With a static module temperature the output only depends on the step,
+    so the model is run once per step for every distinct plant and the
+    (read-only) arrays are shared by all units with the same plant. Only
+    the recently used plants are cached, units keep their arrays.
+    """
+    midas_pp = _create_midas_pp(a_m2, eta_percent, t_module_deg_celsius)
+    p_kw = np.empty(len(profile))
+    q_kvar = np.empty(len(profile))
+    for step in range(len(profile)):
+        _step_midas_pp(
+            midas_pp, profile, UnitInput(PRECOMPUTED_STEP_SIZE, None, None), step
+        )
+        p_kw[step] = midas_pp.get_p_kw()
+        q_kvar[step] = midas_pp.get_q_kvar()
+    p_kw.flags.writeable = False
+    q_kvar.flags.writeable = False
+    return p_kw, q_kvar
+
+
 class MidasPVUnit(Unit):
 
-    def __init__(self, pv_information: PVInformation, forecast_horizon=8) -> None:
+    def __init__(
+        self,
+        pv_information: PVInformation,
+        forecast_horizon=8,
+        precompute_profile=True,
+    ) -> None:
+        """
+        :param pv_information: Parameters and irradiance profile of the plant
+        :param forecast_horizon: Number of forecasted steps after the current
+        :param precompute_profile: Serve steps and forecasts of 15 minutes
+            from the output of the pysimmods model precomputed for the whole
+            profile, instead of running the model on every call (other step
+            sizes always run the model)
+        """
         super().__init__(pv_information.unit_id)
 
-        self._midas_pp = PhotovoltaicPowerPlant(
-            {
-                "a_m2": pv_information.a_m2,
-                "eta_percent": pv_information.eta_percent,
-                "is_static_t_module": True,
-            },
-            {"t_module_deg_celsius": pv_information.t_module_deg_celsius},
+        self._midas_pp = _create_midas_pp(
+            pv_information.a_m2,
+            pv_information.eta_percent,
+            pv_information.t_module_deg_celsius,
         )
+        if pv_information.forecast_seed is None:
+            # fix the seed, so the forecasts of the unit survive a reload
+            pv_information = pv_information.model_copy(
+                update={"forecast_seed": random.getrandbits(64)}
+            )
         self._internal_information = pv_information
         self._profile = pv_information.pv_p_kw
+        self._forecast_cache = None
+        self._forecast_pp = None
+        self._p_kw = None
+        self._q_kvar = None
+        if precompute_profile:
+            self._p_kw, self._q_kvar = _precompute_pv_power(
+                tuple(self._profile),
+                pv_information.a_m2,
+                pv_information.eta_percent,
+                pv_information.t_module_deg_celsius,
+            )
         self.forecast_horizon = forecast_horizon
         self.time_step = 0
 
@@ -50,52 +132,84 @@ class MidasPVUnit(Unit):
         self.time_step = step
         return self.get_pv_power(input, step)
 
+    def _is_precomputed(self, step_size):
+        return self._p_kw is not None and step_size == PRECOMPUTED_STEP_SIZE
+
+    def step_values(self, delta_t, p_kw, q_kvar, step):
+        self.time_step = step
+        if self._is_precomputed(delta_t):
+            return float(self._p_kw[step]), float(self._q_kvar[step])
+        result = self.get_pv_power(UnitInput(delta_t, p_kw, q_kvar), step)
+        return result.p_kw, result.q_kvar
+
     def get_pv_power(self, input: UnitInput, step: int):
-        # step midas model
-        self._midas_pp.set_p_kw(
-            input.p_kw
-        )  # not needed for pvsim (only for pvsystemsim)
-        self._midas_pp.set_q_kvar(
-            input.q_kvar
-        )  # not needed for pvsim (only for pvsystemsim)
-        self._midas_pp.set_step_size(input.delta_t)
-        self._midas_pp.inputs.bh_w_per_m2 = (
-            0  # if not 0, midas applies lat/long based irradiance model
-        )
-        self._midas_pp.inputs.dh_w_per_m2 = self._profile[step]
-        self._midas_pp.inputs.t_air_deg_celsius = DEFAULT_CONST_TEMP
-        self._midas_pp.inputs.now_dt = datetime.datetime(
-            2000, 1, 1, step // 4, (step * 15) % 60, 0, 0
-        )
-        self._midas_pp.step()
+        if self._is_precomputed(input.delta_t):
+            return UnitResult(
+                p_kw=float(self._p_kw[step]), q_kvar=float(self._q_kvar[step])
+            )
 
+        # step midas model
+        _step_midas_pp(self._midas_pp, self._profile, input, step)
         return UnitResult(
             p_kw=self._midas_pp.get_p_kw(), q_kvar=self._midas_pp.get_q_kvar()
         )
 
     def read_information(self) -> UnitInformation:
-        return PVForecastInformation(
-            unit_id=self.id,
-            forecast_pv_p_kw=self.get_forecast(
-                start_index=self.time_step,
-                end_index=self.time_step + 1 + self.forecast_horizon,
-            ),
+        # the forecast only depends on the step, so it is computed once per step
+        if self._forecast_cache is None or self._forecast_cache[0] != self.time_step:
+            self._forecast_cache = (
+                self.time_step,
+                PVForecastInformation(
+                    unit_id=self.id,
+                    forecast_pv_p_kw=self.get_forecast(
+                        start_index=self.time_step,
+                        end_index=self.time_step + 1 + self.forecast_horizon,
+                    ),
+                ),
+            )
+        return self._forecast_cache[1]
+
+    def _forecast_pv_power(self, step: int, step_size: int):
+        if self._is_precomputed(step_size):
+            return float(self._p_kw[step])
+
+        # separate model, forecasting must not touch the state of the stepped one
+        if self._forecast_pp is None:
+            self._forecast_pp = _create_midas_pp(
+                self._internal_information.a_m2,
+                self._internal_information.eta_percent,
+                self._internal_information.t_module_deg_celsius,
+            )
+        _step_midas_pp(
+            self._forecast_pp, self._profile, UnitInput(step_size, None, None), step
         )
+        return self._forecast_pp.get_p_kw()
+
+    def get_forecast(self, start_index, end_index, step_size=PRECOMPUTED_STEP_SIZE):
+        """Forecast of the PV power from start_index to end_index (exclusive).
 
-    def get_forecast(self, start_index, end_index, step_size=15 * 60):
+        The noise of the forecast is drawn from a generator seeded with the
+        forecast seed of the unit and the start index, so the same forecast
+        is returned for the same indices.
+        """
         # limit indices
         start_index = min(start_index, len(self._profile))
         end_index = min(end_index, len(self._profile))
 
+        noise = np.random.default_rng(
+            [self._internal_information.forecast_seed, start_index]
+        ).uniform(-1, 1, max(end_index - start_index, 0))
         p_forecast = []
         for step in range(start_index, end_index):
-            result = self.get_pv_power(UnitInput(step_size, None, None), step)
+            p_kw = self._forecast_pv_power(step, step_size)
             # respect growing uncertainty with forecast time
             step_index = step - start_index
             factor_uncert = step_index * 0.05
             factor_const = 1 - factor_uncert
             # add value to forecast
-            p_forecast.append(result.p_kw * (factor_const + random.uniform(-1, 1) * factor_uncert))
+            p_forecast.append(
+                p_kw * (factor_const + float(noise[step_index]) * factor_uncert)
+            )
 
         return p_forecast
 
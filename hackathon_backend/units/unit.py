@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import Optional, Dict
+from typing import Optional, Dict, Tuple
 from pydantic import BaseModel
 from dataclasses import dataclass
 
@@ -35,6 +35,15 @@ class Unit(ABC):
     ) -> UnitResult:
         return None
 
+    def step_values(
+        self, delta_t: float, p_kw: float, q_kvar: float, step: int
+    ) -> Tuple[float, float]:
+        """Step the unit like step, but with plain values as input and
+        (p_kw, q_kvar) as result. Units override it to avoid creating the
+        UnitInput and UnitResult of every step."""
+        result = self.step(UnitInput(delta_t, p_kw, q_kvar), step)
+        return result.p_kw, result.q_kvar
+
     @abstractmethod
     def read_information(self) -> UnitInformation:
         return None
@@ -1,10 +1,12 @@
 from abc import abstractmethod, ABC
-from typing import List, Dict
+from typing import List, Dict, Optional
 import logging
 
 from hackathon_backend.units.unit import UnitInformation
 from .unit import Unit, UnitInput, UnitResult
-from .battery import BatteryUnit
+from .battery import BatteryUnit, MidasBatteryUnit
+from .load import SimpleDemandUnit
+from .pv import MidasPVUnit
 
 
 VPP_ID = "-1"
@@ -12,6 +14,14 @@ VPP_ID = "-1"
 logger = logging.getLogger(__name__)
 
 
+class ExecutionPlan(ABC):
+    """Flat plan to step the units of a VPP, compiled once by its strategy."""
+
+    @abstractmethod
+    def step(self, input: UnitInput, step: int) -> UnitResult:
+        pass
+
+
 class VPPStrategy(ABC):
     @abstractmethod
     def step(
@@ -23,6 +33,12 @@ class VPPStrategy(ABC):
     ) -> UnitResult:
         pass
 
+    def compile(self, units: List[Unit]) -> Optional[ExecutionPlan]:
+        """Compile the units into an execution plan, which the VPP steps
+        instead of the strategy until its units change. Without a plan
+        (default) the strategy is stepped."""
+        return None
+
 
 def find_unit(id, units: List[Unit]):
     for unit in units:
@@ -30,7 +46,92 @@ def find_unit(id, units: List[Unit]):
             return unit
 
 
+class BatteryAdjustPlan(ExecutionPlan):
+    """Plan of the BatteryAdjustVPPStrategy with the units partitioned into
+    generators, loads, other units and storage."""
+
+    def __init__(self, units: List[Unit]) -> None:
+        non_storage = [unit for unit in units if not isinstance(unit, BatteryUnit)]
+        # position of the results in the buffers, in the order of the units
+        positioned = list(enumerate(non_storage))
+        self.generators = [
+            (position, unit)
+            for position, unit in positioned
+            if isinstance(unit, MidasPVUnit)
+        ]
+        self.loads = [
+            (position, unit)
+            for position, unit in positioned
+            if isinstance(unit, SimpleDemandUnit)
+        ]
+        self.others = [
+            (position, unit)
+            for position, unit in positioned
+            if not isinstance(unit, (MidasPVUnit, SimpleDemandUnit))
+        ]
+        self.storage = [unit for unit in units if isinstance(unit, BatteryUnit)]
+        # fleet of all batteries, if they can be stepped together with others
+        fleets = {
+            id(unit.fleet): unit.fleet
+            for unit in self.storage
+            if isinstance(unit, MidasBatteryUnit)
+        }
+        self.fleet = None
+        if len(fleets) == 1 and all(
+            isinstance(unit, MidasBatteryUnit) for unit in self.storage
+        ):
+            self.fleet = next(iter(fleets.values()))
+        self._non_storage = self.generators + self.loads + self.others
+        self._p_kw = [0.0] * len(non_storage)
+        self._q_kvar = [0.0] * len(non_storage)
+
+    def step_non_storage(self, input: UnitInput, step: int):
+        """Step everything except the batteries and return the summed up
+        (p_kw, q_kvar)."""
+        delta_t = input.delta_t
+        p_kw_buffer = self._p_kw
+        q_kvar_buffer = self._q_kvar
+
+        # everthing except batteries, as they will be adjusted
+        # to deliver the remaining energy as best as possible
+        for position, unit in self._non_storage:
+            p_kw_buffer[position], q_kvar_buffer[position] = unit.step_values(
+                delta_t, input.p_kw, input.q_kvar, step
+            )
+        # summed up in the order of the units
+        return sum(p_kw_buffer), sum(q_kvar_buffer)
+
+    def step(self, input: UnitInput, step: int) -> UnitResult:
+        delta_t = input.delta_t
+        p_kw_sum, q_kvar_sum = self.step_non_storage(input, step)
+
+        remaining_p_kw = input.p_kw + p_kw_sum
+        remaining_q_kvar = input.q_kvar + q_kvar_sum
+        for unit in self.storage:
+            p_kw, q_kvar = unit.step_values(
+                delta_t, -remaining_p_kw, -remaining_q_kvar, step
+            )
+            p_kw_sum += p_kw
+            q_kvar_sum += q_kvar
+
+            # rest for next battery
+            remaining_p_kw += p_kw
+            remaining_q_kvar += q_kvar
+
+        return UnitResult(p_kw=-p_kw_sum, q_kvar=-q_kvar_sum)
+
+
 class BatteryAdjustVPPStrategy(VPPStrategy):
+    def __init__(self) -> None:
+        # (ids of the units, plan) of the units stepped last, VPPs step their
+        # own plan and only use it if the strategy is stepped directly
+        self._last_plan = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_last_plan"] = None
+        return state
+
     def step(
         self,
         input: UnitInput,
@@ -38,43 +139,83 @@ class BatteryAdjustVPPStrategy(VPPStrategy):
         units: List[Unit],
         step: int,
     ) -> UnitResult:
-        p_kw_sum = 0
-        q_kvar_sum = 0
+        units = list(units)
+        # the plan references the units, so their ids are not reused
+        unit_ids = tuple(id(unit) for unit in units)
+        if self._last_plan is None or self._last_plan[0] != unit_ids:
+            self._last_plan = (unit_ids, self.compile(units))
+        return self._last_plan[1].step(input, step)
 
-        # everthing except batteries, as they will be adjusted
-        # to deliver the remaining energy as best as possible
-        for unit in [unit for unit in units if not isinstance(unit, BatteryUnit)]:
-            result = unit.step(input, step)
-            logger.info("Unit %s result: %s", unit.id, result)
-            p_kw_sum += result.p_kw
-            q_kvar_sum += result.q_kvar
-
-        remaining_request = UnitInput(
-            input.delta_t,
-            p_kw=input.p_kw + p_kw_sum,
-            q_kvar=input.q_kvar + q_kvar_sum,
-        )
-        for unit in [unit for unit in units if isinstance(unit, BatteryUnit)]:
-            result = unit.step(
-                UnitInput(
-                    remaining_request.delta_t,
-                    p_kw=-remaining_request.p_kw,
-                    q_kvar=-remaining_request.q_kvar,
-                ),
-                step,
-            )
-            logger.info("Unit %s result: %s", unit.id, result)
-            p_kw_sum += result.p_kw
-            q_kvar_sum += result.q_kvar
+    def compile(self, units: List[Unit]) -> BatteryAdjustPlan:
+        return BatteryAdjustPlan(list(units))
+
+
+def _step_plans_batched(
+    plans: List[BatteryAdjustPlan], inputs: List[UnitInput], step: int
+) -> List[UnitResult]:
+    """Step plans, which batteries are in the same fleet, with one vectorized
+    fleet step per position of the batteries in the plans.
+
+    Same as BatteryAdjustPlan.step: the batteries of a fleet have no
+    reactive power (see MidasBatteryUnit.step_values), so the reactive
+    power is the one of the other units."""
+    sums = [plan.step_non_storage(input, step) for plan, input in zip(plans, inputs)]
+    p_kw_sums = [p_kw_sum for p_kw_sum, _ in sums]
+    q_kvar_sums = [q_kvar_sum for _, q_kvar_sum in sums]
+    remaining_p_kw = [
+        input.p_kw + p_kw_sum for input, p_kw_sum in zip(inputs, p_kw_sums)
+    ]
 
+    fleet = plans[0].fleet
+    delta_t = inputs[0].delta_t
+    n_storage = max(len(plan.storage) for plan in plans)
+    for storage_position in range(n_storage):
+        members = [
+            member
+            for member, plan in enumerate(plans)
+            if len(plan.storage) > storage_position
+        ]
+        p_kw = fleet.step(
+            [plans[member].storage[storage_position].index for member in members],
+            [-remaining_p_kw[member] for member in members],
+            delta_t,
+        ).tolist()
+        for member, battery_p_kw in zip(members, p_kw):
+            p_kw_sums[member] += battery_p_kw
             # rest for next battery
-            remaining_request = UnitInput(
-                remaining_request.delta_t,
-                p_kw=remaining_request.p_kw + result.p_kw,
-                q_kvar=remaining_request.q_kvar + result.q_kvar,
-            )
+            remaining_p_kw[member] += battery_p_kw
+
+    return [
+        UnitResult(p_kw=-p_kw_sum, q_kvar=-q_kvar_sum)
+        for p_kw_sum, q_kvar_sum in zip(p_kw_sums, q_kvar_sums)
+    ]
 
-        return UnitResult(p_kw=-p_kw_sum, q_kvar=-q_kvar_sum)
+
+def step_units(units: List[Unit], inputs: List[UnitInput], step: int):
+    """Step several unit trees, like stepping them one after another.
+
+    The VPPs, which execution plans have their batteries in the same fleet,
+    are stepped together: the batteries at the same position in the VPPs are
+    stepped with one vectorized call of the fleet."""
+    results = [None] * len(units)
+    batches = {}
+    for i, (unit, input) in enumerate(zip(units, inputs)):
+        plan = unit.plan if isinstance(unit, VPP) else None
+        if isinstance(plan, BatteryAdjustPlan) and plan.fleet is not None:
+            batch = batches.get((id(plan.fleet), input.delta_t))
+            if batch is None:
+                batch = batches[(id(plan.fleet), input.delta_t)] = ([], [], [])
+            batch[0].append(i)
+            batch[1].append(plan)
+            batch[2].append(input)
+        else:
+            results[i] = unit.step(input, step, other_inputs=[])
+
+    for members, plans, plan_inputs in batches.values():
+        batch_results = _step_plans_batched(plans, plan_inputs, step)
+        for i, result in zip(members, batch_results):
+            results[i] = result
+    return results
 
 
 class VPPInformation(UnitInformation):
@@ -90,9 +231,25 @@ class VPP(Unit):
 
         self.strategy = strategy
         self.sub_units = {}
+        self._plan = None
+
+    def __getstate__(self):
+        # the plan is compiled again from the copied units
+        state = self.__dict__.copy()
+        state["_plan"] = None
+        return state
 
     def add_unit(self, unit: Unit):
         self.sub_units[unit.id] = unit
+        self._plan = None
+
+    @property
+    def plan(self) -> Optional[ExecutionPlan]:
+        """Execution plan of the strategy, compiled on the first step after
+        the units changed."""
+        if self._plan is None and self.strategy is not None:
+            self._plan = self.strategy.compile(list(self.sub_units.values()))
+        return self._plan
 
     def step(
         self, input: UnitInput, step: int, other_inputs: Dict[str, UnitInput] = None
@@ -108,6 +265,8 @@ class VPP(Unit):
                     )
                 else:
                     sub_unit.step(input, step, other_inputs=other_inputs)
+        elif self.plan is not None:
+            return self._plan.step(input, step)
         else:
             return self.strategy.step(
                 input=input,
@@ -0,0 +1,175 @@
+import multiprocessing
+import threading
+from typing import Dict, Iterable, List
+from .unit import Unit, UnitInformation, UnitInput, UnitResult
+from .vpp import step_units
+
+
+def _worker_main(connection):
+    """Loop of a worker process, which owns the unit trees of its actors."""
+    actor_to_root = {}
+    while True:
+        command, *args = connection.recv()
+        try:
+            if command == "insert":
+                actor_id, root = args
+                actor_to_root[actor_id] = root
+                reply = None
+            elif command == "step":
+                inputs, step = args
+                results = step_units(
+                    [actor_to_root[actor_id] for actor_id in inputs.keys()],
+                    list(inputs.values()),
+                    step,
+                )
+                reply = dict(zip(inputs.keys(), results))
+            elif command == "read":
+                actor_ids, full = args
+                reply = {
+                    actor_id: (
+                        actor_to_root[actor_id].read_full_information()
+                        if full
+                        else actor_to_root[actor_id].read_information()
+                    )
+                    for actor_id in actor_ids
+                }
+            elif command == "fetch":
+                (actor_ids,) = args
+                reply = {actor_id: actor_to_root[actor_id] for actor_id in actor_ids}
+            elif command == "stop":
+                connection.close()
+                return
+            else:
+                raise ValueError(f"Unknown command {command}!")
+            connection.send(("ok", reply))
+        except Exception as e:
+            connection.send(("error", e))
+
+
+class UnitWorkers:
+    """Persistent worker processes owning the unit trees of their actors.
+
+    Actors are assigned round-robin in the order of their insertion, every
+    unit tree is only stepped by its worker. Per step only the inputs and
+    the results are exchanged, the trees are only transferred back on
+    fetch. Every command holds a lock until all its replies arrived, so the
+    workers can be used from several threads."""
+
+    def __init__(self, n_workers: int, start_method="spawn") -> None:
+        context = multiprocessing.get_context(start_method)
+        self._connections = []
+        self._processes = []
+        for _ in range(n_workers):
+            connection, worker_connection = context.Pipe()
+            process = context.Process(
+                target=_worker_main, args=(worker_connection,), daemon=True
+            )
+            process.start()
+            worker_connection.close()
+            self._connections.append(connection)
+            self._processes.append(process)
+        self._actor_to_worker: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def n_workers(self):
+        return len(self._connections)
+
+    def _call(self, worker, command, *args):
+        with self._lock:
+            self._connections[worker].send((command, *args))
+            return self._receive(worker)
+
+    def _receive(self, worker):
+        status, reply = self._connections[worker].recv()
+        if status == "error":
+            raise reply
+        return reply
+
+    def _receive_all(self, workers):
+        """Receive the replies of all workers, before raising the first
+        error, so no reply is left in a pipe for a later command."""
+        replies = {}
+        error = None
+        for worker in workers:
+            try:
+                replies.update(self._receive(worker))
+            except Exception as e:
+                if error is None:
+                    error = e
+        if error is not None:
+            raise error
+        return replies
+
+    def insert(self, actor_id: str, root: Unit):
+        with self._lock:
+            worker = self._actor_to_worker.get(actor_id)
+            if worker is None:
+                worker = len(self._actor_to_worker) % self.n_workers
+                self._actor_to_worker[actor_id] = worker
+        self._call(worker, "insert", actor_id, root)
+
+    def _group_by_worker(self, actor_ids: Iterable[str]):
+        groups = [[] for _ in range(self.n_workers)]
+        for actor_id in actor_ids:
+            groups[self._actor_to_worker[actor_id]].append(actor_id)
+        return groups
+
+    def _call_all(self, command, worker_args: List):
+        """Send a command to all workers at once, then collect the replies."""
+        with self._lock:
+            busy = []
+            for worker, args in enumerate(worker_args):
+                if args is not None:
+                    self._connections[worker].send((command, *args))
+                    busy.append(worker)
+            return self._receive_all(busy)
+
+    def step(self, inputs: Dict[str, UnitInput], step: int) -> Dict[str, UnitResult]:
+        """Step the actors in parallel, the results are returned in the order
+        of the inputs."""
+        groups = self._group_by_worker(inputs.keys())
+        replies = self._call_all(
+            "step",
+            [
+                ({actor_id: inputs[actor_id] for actor_id in group}, step)
+                if group
+                else None
+                for group in groups
+            ],
+        )
+        return {actor_id: replies[actor_id] for actor_id in inputs.keys()}
+
+    def read(
+        self, actor_ids: Iterable[str], full=False
+    ) -> Dict[str, UnitInformation]:
+        """Return the unit information (or with full, the full information
+        to restore them) of the unit trees of the actors."""
+        actor_ids = list(actor_ids)
+        groups = self._group_by_worker(actor_ids)
+        replies = self._call_all(
+            "read", [(group, full) if group else None for group in groups]
+        )
+        return {actor_id: replies[actor_id] for actor_id in actor_ids}
+
+    def fetch(self, actor_ids: Iterable[str]) -> Dict[str, Unit]:
+        """Return copies of the current unit trees of the actors."""
+        actor_ids = list(actor_ids)
+        groups = self._group_by_worker(actor_ids)
+        replies = self._call_all(
+            "fetch", [(group,) if group else None for group in groups]
+        )
+        return {actor_id: replies[actor_id] for actor_id in actor_ids}
+
+    def close(self):
+        with self._lock:
+            for connection, process in zip(self._connections, self._processes):
+                try:
+                    connection.send(("stop",))
+                except OSError:
+                    pass
+                process.join(timeout=5)
+                connection.close()
+            self._connections = []
+            self._processes = []
+            self._actor_to_worker = {}
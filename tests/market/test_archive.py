@@ -0,0 +1,95 @@
+from hackathon_backend.market.market import Market
+from hackathon_backend.market.archive import AuctionArchive
+from hackathon_backend.market.auction import initiate_electricity_ask_auction
+
+
+def _run_market(market, n_steps):
+    for time_index in range(n_steps):
+        current_time = time_index * 900
+        market.inputs._now_dt = current_time
+        auction = initiate_electricity_ask_auction(current_time, tender_amount=2)
+        market.receive_auction(auction)
+        market.receive_order(
+            amount_kw=[1, 1],
+            price_ct=time_index,
+            agents=["A", "B"],
+            supply_time=auction.params.supply_start_time,
+            product_type="electricity",
+        )
+        market.step()
+
+
+def test_expired_auctions_spilled_to_archive(tmp_path):
+    # GIVEN
+    archive = AuctionArchive(tmp_path / "archive.jsonl")
+    market = Market(max_expired_auctions=2, archive=archive)
+
+    # WHEN
+    _run_market(market, 12)
+
+    # THEN
+    # auctions expire 6 steps after their creation
+    assert len(market.expired_auctions) == 2
+    assert len(archive) == 4
+    assert [a.result.clearing_price for a in archive.read()] == [0, 1, 2, 3]
+    assert market.get_price_history() == [0, 1, 2, 3, 4, 5]
+
+
+def test_unbounded_expired_auctions():
+    # GIVEN
+    market = Market()
+
+    # WHEN
+    _run_market(market, 12)
+
+    # THEN
+    assert len(market.expired_auctions) == 6
+    assert market.get_price_history() == [0, 1, 2, 3, 4, 5]
+
+
+def test_restored_archive_ignores_stale_lines(tmp_path):
+    # GIVEN
+    fp = tmp_path / "archive.jsonl"
+    market = Market(max_expired_auctions=0, archive=AuctionArchive(fp))
+    _run_market(market, 9)
+    assert len(market.archive) == 3
+
+    # WHEN
+    restored = AuctionArchive(fp, size=2)
+    restored.append(initiate_electricity_ask_auction(0))
+
+    # THEN
+    assert len(restored) == 3
+    assert len(list(restored.read())) == 3
+    with open(fp) as f:
+        assert len(f.readlines()) == 3
+
+    # WHEN
+    market.reset()
+
+    # THEN
+    assert not fp.exists()
+    assert market.get_price_history() == []
+
+
+def test_price_history_pagination(tmp_path):
+    # GIVEN
+    market = Market(max_expired_auctions=1, archive=AuctionArchive(tmp_path / "a"))
+    _run_market(market, 12)
+
+    # WHEN
+    delta = market.get_price_history(offset=4)
+    page = market.get_price_history(offset=1, limit=2)
+    prices = market.get_price_history_array()
+
+    # THEN
+    assert delta == [4, 5]
+    assert page == [1, 2]
+    assert list(prices) == [0, 1, 2, 3, 4, 5]
+
+    # WHEN
+    history = list(market.price_history)
+    market.rebuild_price_history()
+
+    # THEN
+    assert list(market.price_history) == history
@@ -1,3 +1,4 @@
+import pytest
 from hackathon_backend.market.auction import *
 
 def test_auction_clearing1():
@@ -76,4 +77,184 @@ def test_auction_clearing2():
     assert auction_result.clearing_price == 20
     assert len(auction_result.awarded_orders) == 2
     assert auction_result.awarded_orders[0].awarded_amount_kw == 1
-    assert auction_result.awarded_orders[1].awarded_amount_kw == 1
\ No newline at end of file
+    assert auction_result.awarded_orders[1].awarded_amount_kw == 1
+
+
+def test_order_container_sorted_on_insert():
+    # GIVEN
+    container = OrderContainer()
+    prices = [30, 10, 20, 10, 5]
+
+    # WHEN
+    for i, price in enumerate(prices):
+        container.add_order(
+            OrderRecord(agents=[str(i)], amount_kw=[1], price_ct=price, auction_id="a")
+        )
+
+    # THEN
+    assert len(container) == 5
+    assert [order.price_ct for order in container] == [5, 10, 10, 20, 30]
+    # equal prices keep their arrival order
+    assert [order.agents[0] for order in container.orders] == ["4", "1", "3", "2", "0"]
+
+
+def test_auction_clearing_without_sort():
+    # GIVEN
+    auction_params = AuctionParameters(
+        product_type="electricity",
+        gate_opening_time=0,
+        gate_closure_time=10,
+        supply_start_time=20,
+        supply_duration_s=10,
+        tender_amount_kw=3,
+    )
+    auction = ElectricityAskAuction(auction_params, current_time=0)
+    auction.place_order(amount_kw=[2], price_ct=30, agents=["C"])
+    auction.place_order(amount_kw=[1], price_ct=10, agents=["A"])
+    auction.place_order(amount_kw=[1, 1], price_ct=20, agents=["B1", "B2"])
+
+    # WHEN
+    auction_result = auction.clear()
+
+    # THEN
+    assert auction_result.clearing_price == 20
+    assert [order.agents for order in auction_result.awarded_orders] == [
+        ["A"],
+        ["B1", "B2"],
+    ]
+    assert auction_result.awarded_orders[1].awarded_amount_kw == [1, 1]
+
+
+def test_agent_award_index():
+    # GIVEN
+    auction_params = AuctionParameters(
+        product_type="electricity",
+        gate_opening_time=0,
+        gate_closure_time=10,
+        supply_start_time=20,
+        supply_duration_s=10,
+        tender_amount_kw=10,
+    )
+    auction = ElectricityAskAuction(auction_params, current_time=0)
+    auction.place_order(amount_kw=[1], price_ct=10, agents=["A"])
+    auction.place_order(amount_kw=[1, 2], price_ct=20, agents=["A", "B"])
+    auction.place_order(amount_kw=[1, 1], price_ct=30, agents=["C", "C"])
+
+    # WHEN
+    auction_result = auction.clear()
+
+    # THEN
+    assert [i for _, i in auction_result.get_agent_awards("A")] == [0, 0]
+    assert [i for _, i in auction_result.get_agent_awards("C")] == [0, 1]
+    assert auction_result.get_agent_awards("D") == []
+    assert len(auction_result.get_awarded_orders_of_agent("C")) == 1
+    assert [o.price_ct for o in auction_result.get_awarded_orders_of_agent("A")] == [
+        10,
+        20,
+    ]
+
+    # WHEN the result is restored without index
+    restored = AuctionResult.model_validate_json(auction_result.model_dump_json())
+
+    # THEN
+    assert restored.get_awarded_orders_of_agent("B") == [auction_result.awarded_orders[1]]
+
+
+def test_order_record_conversion():
+    # GIVEN
+    record = OrderRecord(
+        agents=["A", "B"], amount_kw=[1.0, 2.0], price_ct=3.0, auction_id="a"
+    )
+
+    # WHEN
+    order = record.to_order()
+    restored = OrderRecord.from_order(order)
+
+    # THEN
+    assert record.total_kw == 3.0
+    assert order == Order(agents=["A", "B"], amount_kw=[1, 2], price_ct=3, auction_id="a")
+    assert restored.total_kw == 3.0
+    assert restored.to_order() == order
+
+
+def test_cancel_and_amend_orders():
+    # GIVEN
+    auction_params = AuctionParameters(
+        product_type="electricity",
+        gate_opening_time=0,
+        gate_closure_time=10,
+        supply_start_time=20,
+        supply_duration_s=10,
+        tender_amount_kw=2,
+    )
+    auction = ElectricityAskAuction(auction_params, current_time=0)
+    id_a = auction.place_order(amount_kw=[1], price_ct=10, agents=["A"])
+    id_b = auction.place_order(amount_kw=[1], price_ct=20, agents=["B"])
+    id_c = auction.place_order(amount_kw=[1], price_ct=30, agents=["C"])
+
+    # WHEN
+    auction.cancel_order(id_a)
+    auction.amend_order(id_c, price_ct=5)
+    auction.amend_order(id_b, amount_kw=[2])
+
+    # THEN
+    assert len({id_a, id_b, id_c}) == 3
+    assert [order.order_id for order in auction.order_container] == [id_c, id_b]
+    assert auction.order_container.get_order(id_a) is None
+
+    # WHEN
+    auction_result = auction.clear()
+
+    # THEN
+    assert auction_result.clearing_price == 20
+    assert [order.order_id for order in auction_result.awarded_orders] == [id_c, id_b]
+    assert auction_result.awarded_orders[1].awarded_amount_kw == [1]
+
+
+def test_amend_order_rejected():
+    # GIVEN
+    auction_params = AuctionParameters(
+        product_type="electricity",
+        gate_opening_time=0,
+        gate_closure_time=10,
+        supply_start_time=20,
+        supply_duration_s=10,
+        tender_amount_kw=2,
+    )
+    auction = ElectricityAskAuction(auction_params, current_time=0)
+    order_id = auction.place_order(amount_kw=[1, 1], price_ct=10, agents=["A", "B"])
+
+    # WHEN / THEN
+    with pytest.raises(Exception):
+        auction.amend_order(order_id, amount_kw=[2])
+    with pytest.raises(KeyError):
+        auction.cancel_order("unknown")
+    auction.step(10)
+    with pytest.raises(Exception):
+        auction.cancel_order(order_id)
+    assert len(auction.order_container) == 1
+
+
+def test_cancel_and_amend_in_crowded_price_level():
+    # GIVEN
+    container = OrderContainer()
+    orders = [
+        OrderRecord(["A"], [1.0], 1000, "a", order_id=f"a:{i}") for i in range(1000)
+    ]
+    for order in orders:
+        container.add_order(order)
+
+    # WHEN
+    for order in orders[:900:2]:
+        container.remove_order(order.order_id)
+    container.update_amount("a:501", [3.0])
+    ordered, prices_ct, total_amounts_kw = container.to_columns()
+
+    # THEN
+    remaining = orders[1:900:2] + orders[900:]
+    assert ordered == remaining
+    assert len(container) == len(remaining)
+    assert prices_ct.tolist() == [1000] * len(remaining)
+    assert total_amounts_kw.tolist() == [
+        3.0 if order.order_id == "a:501" else 1.0 for order in remaining
+    ]
@@ -0,0 +1,41 @@
+import numpy as np
+from hackathon_backend.market.clearing import clear_merit_order
+
+
+def test_clear_merit_order_marginal_order():
+    # GIVEN
+    prices = np.array([1.0, 2.0, 3.0])
+    amounts = np.array([1.0, 2.0, 1.0])
+
+    # WHEN
+    clearing = clear_merit_order(prices, amounts, 2)
+
+    # THEN
+    assert clearing.marginal_index == 1
+    assert clearing.marginal_remaining_kw == 1
+    assert clearing.clearing_price == 2
+    assert clearing.n_awarded == 2
+
+
+def test_clear_merit_order_all_awarded():
+    # GIVEN
+    prices = np.array([1.0, 2.0])
+    amounts = np.array([1.0, 1.0])
+
+    # WHEN
+    clearing = clear_merit_order(prices, amounts, 10)
+
+    # THEN
+    assert clearing.marginal_index == 2
+    assert clearing.marginal_remaining_kw is None
+    assert clearing.clearing_price == 2
+    assert clearing.n_awarded == 2
+
+
+def test_clear_merit_order_no_orders():
+    # WHEN
+    clearing = clear_merit_order(np.array([]), np.array([]), 10)
+
+    # THEN
+    assert clearing.n_awarded == 0
+    assert clearing.clearing_price is None
@@ -129,4 +129,158 @@ def test_order_placed():
         number_awarded_orders = [len(result.awarded_orders) for result in auction_results]
         if number_awarded_orders:
             assert 2 >= min(number_awarded_orders)
-    # assert 1 == 0
\ No newline at end of file
+    # assert 1 == 0
+
+
+def test_auction_index_routing():
+    # GIVEN
+    market = Market()
+    auction = initiate_electricity_ask_auction(0, tender_amount=2)
+    market.receive_auction(auction)
+    supply_time = auction.params.supply_start_time
+
+    # WHEN
+    ok = market.receive_order(
+        amount_kw=[1],
+        price_ct=1,
+        agents=["agent1"],
+        supply_time=supply_time,
+        product_type="electricity",
+    )
+
+    # THEN
+    assert ok
+    assert len(auction.order_container) == 1
+    assert market._get_auction_id_from_supply_time_and_product_type(
+        supply_time, "electricity"
+    ) == auction.id
+    assert not market.receive_order(
+        amount_kw=[1],
+        price_ct=1,
+        agents=["agent1"],
+        supply_time=supply_time + 1,
+        product_type="electricity",
+    )
+
+    # WHEN the auction expires
+    market.inputs._now_dt = supply_time + auction.params.supply_duration_s
+    market.step()
+
+    # THEN
+    assert (supply_time, "electricity") not in market.auction_index
+
+    # WHEN
+    market.receive_auction(initiate_electricity_ask_auction(900))
+    market.reset()
+
+    # THEN
+    assert market.auction_index == {}
+
+
+def test_auction_index_first_auction_wins():
+    # GIVEN
+    market = Market()
+    first = initiate_electricity_ask_auction(0, tender_amount=2)
+    second = initiate_electricity_ask_auction(0, tender_amount=2)
+    market.receive_auction(first)
+    market.receive_auction(second)
+    key = (first.params.supply_start_time, "electricity")
+
+    # THEN
+    assert market.auction_index[key] is first
+
+    # WHEN
+    market.rebuild_schedule()
+
+    # THEN
+    assert market.auction_index[key] is first
+
+    # WHEN the first auction is gone
+    del market.auctions[first.id]
+    market._remove_from_auction_index(first)
+
+    # THEN
+    assert market.auction_index[key] is second
+
+
+def test_receive_orders_batch():
+    # GIVEN
+    market = Market()
+    auction = initiate_electricity_ask_auction(0, tender_amount=2)
+    market.receive_auction(auction)
+    supply_time = auction.params.supply_start_time
+    order = {
+        "amount_kw": [1],
+        "price_ct": 1,
+        "agents": ["agent1"],
+        "supply_time": supply_time,
+        "product_type": "electricity",
+    }
+
+    # WHEN
+    results = market.receive_orders(
+        [
+            order,
+            {**order, "price_ct": 2},
+            {**order, "supply_time": supply_time + 1},
+            {**order, "amount_kw": [0.5]},
+        ]
+    )
+
+    # THEN
+    assert [error for _, error in results[:2]] == [None, None]
+    assert [order.order_id for order in auction.order_container] == [
+        order_id for order_id, _ in results[:2]
+    ]
+    assert results[2] == (None, "The specified auction does not exist!")
+    assert results[3][1].startswith("Order not valid")
+    assert len(auction.order_container) == 2
+    assert market.order_sequence == 2
+
+
+def test_step_only_touches_due_auctions():
+    # GIVEN
+    market = Market()
+    auction = initiate_electricity_ask_auction(0, tender_amount=2)
+    market.receive_auction(auction)
+    steps = []
+    step = auction.step
+    auction.step = lambda current_time: steps.append(current_time) or step(current_time)
+
+    # WHEN
+    for time_index in range(8):
+        market.inputs._now_dt = time_index * 900
+        market.step()
+        if time_index == 0:
+            open_view = market.open_auctions
+
+    # THEN
+    # creation, gate closure and end of supply
+    assert steps == [0, 3600, 5400]
+    assert open_view == [auction]
+    assert market.open_auctions == []
+    assert market.current_auction_results == []
+    assert market.expired_auctions == [auction]
+
+
+def test_rebuild_schedule():
+    # GIVEN
+    market = Market()
+    auction = initiate_electricity_ask_auction(0, tender_amount=2)
+    market.receive_auction(auction)
+    market.inputs._now_dt = 3600
+    market.step()
+
+    # WHEN
+    market.rebuild_schedule()
+
+    # THEN
+    assert market.current_auction_results == [auction.result]
+
+    # WHEN
+    market.inputs._now_dt = 5400
+    market.step()
+
+    # THEN
+    assert market.current_auction_results == []
+    assert market.expired_auctions == [auction]
@@ -176,3 +176,27 @@ def test_payoff_calculation():
     assert accounter.calculate_payoff("C", 2) == 3
     assert accounter.calculate_payoff("C", 1) == 3
     assert accounter.calculate_payoff("C", 0.5) == 1.5
+
+
+def test_invalid_award_agents_rejected():
+    # GIVEN
+    auction = ElectricityAskAuction(
+        AuctionParameters(
+            product_type="electricity",
+            gate_opening_time=0,
+            gate_closure_time=1,
+            supply_start_time=2,
+            supply_duration_s=1,
+            tender_amount_kw=2,
+        ),
+        current_time=0,
+    )
+    auction.place_order([1], 1, ["A"])
+    auction.place_order([1], 2, ["B"])
+    result = auction.clear()
+    result.awarded_orders[-1].agents = [["B"]]
+    accounter = Accounter(auction_result=result)
+
+    # WHEN / THEN
+    with pytest.raises(TypeError):
+        accounter.return_awarded_sum("A")
@@ -0,0 +1,54 @@
+import asyncio
+import pytest
+from hackathon_backend.barrier import ReadyBarrier
+from hackathon_backend.controller import Controller, ControlException
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.mark.anyio
+async def test_ready_barrier_requires_all_actors():
+    # GIVEN
+    barrier = ReadyBarrier()
+    barrier.begin(["a", "b"])
+
+    # WHEN
+    barrier.mark_ready(["a", "unknown"])
+
+    # THEN
+    assert not barrier.is_ready
+
+    # WHEN
+    barrier.mark_ready(["b"])
+
+    # THEN
+    assert barrier.is_ready
+    await asyncio.wait_for(barrier.wait(), 1)
+
+
+@pytest.mark.anyio
+async def test_step_ends_early_when_all_actors_signalled():
+    # GIVEN
+    controller = Controller("tests/config.json")
+    controller.config.ready_barrier = "signal"
+    controller.config.min_step_dwell_s = 0.05
+    actor_id, _ = await controller.register_actor("TestA")
+    step_start = controller.step_clock.now()
+    controller.ready_barrier.begin(controller.actor_to_participant.keys())
+    controller.step_clock.schedule_next(10)
+    step_end = asyncio.ensure_future(controller._wait_for_step_end(step_start))
+    await asyncio.sleep(0)
+
+    # WHEN
+    all_ready = await controller.signal_ready(actor_id)
+    await asyncio.wait_for(step_end, 1)
+
+    # THEN
+    assert all_ready
+    assert controller.step_clock.now() - step_start >= 0.05
+    assert controller.step_clock.remaining_s == 0
+    with pytest.raises(ControlException):
+        await controller.signal_ready("unknown")
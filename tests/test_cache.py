@@ -0,0 +1,52 @@
+import json
+from hackathon_backend.cache import ResponseCache
+
+
+def test_response_cache_serializes_once_per_version():
+    # GIVEN
+    cache = ResponseCache()
+    calls = []
+
+    def build():
+        calls.append(1)
+        return {"auctions": [len(calls)]}
+
+    # WHEN
+    first = cache.get("open", 1, build)
+    second = cache.get("open", 1, build)
+
+    # THEN
+    assert first is second
+    assert json.loads(first) == {"auctions": [1]}
+    assert len(calls) == 1
+
+    # WHEN
+    third = cache.get("open", 2, build)
+
+    # THEN
+    assert json.loads(third) == {"auctions": [2]}
+    assert len(calls) == 2
+
+
+def test_response_cache_evicts_least_recently_used_entry():
+    # GIVEN
+    cache = ResponseCache(max_entries=2)
+    calls = []
+
+    def build():
+        calls.append(1)
+        return len(calls)
+
+    cache.get("a", 1, build)
+    cache.get("b", 1, build)
+    cache.get("a", 1, build)
+
+    # WHEN
+    cache.get("c", 1, build)
+
+    # THEN
+    assert len(calls) == 3
+    assert json.loads(cache.get("a", 1, build)) == 1
+    assert len(calls) == 3
+    assert json.loads(cache.get("b", 1, build)) == 4
+    assert len(calls) == 4
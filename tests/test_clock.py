@@ -0,0 +1,53 @@
+from hackathon_backend.clock import StepClock
+
+
+def test_step_clock_deadlines_do_not_drift():
+    # GIVEN
+    now = [0.0]
+    clock = StepClock(clock=lambda: now[0])
+    clock.schedule_in(0.25)
+
+    # WHEN
+    # the step work finished late
+    now[0] = 0.3
+    clock.schedule_next(0.25)
+
+    # THEN
+    assert clock.remaining_s == 0.2
+
+    # WHEN
+    # fell behind by more than a step
+    now[0] = 2.0
+    clock.schedule_next(0.25)
+
+    # THEN
+    assert clock.remaining_s == 0.25
+    # WHEN
+    # on time again
+    now[0] = 2.375
+    clock.schedule_next(0.25)
+
+    # THEN
+    assert clock.remaining_s == 0.125
+
+
+def test_step_clock_paused():
+    # GIVEN
+    now = [10.0]
+    clock = StepClock(clock=lambda: now[0])
+    clock.schedule_in(1)
+
+    # WHEN
+    clock.paused = True
+
+    # THEN
+    assert clock.remaining_s == -1
+
+    # WHEN
+    now[0] = 20.0
+    clock.paused = False
+    clock.resync()
+    clock.schedule_next(1)
+
+    # THEN
+    assert clock.remaining_s == 1
@@ -0,0 +1,120 @@
+import pytest
+from httpx import ASGITransport, AsyncClient
+from fastapi import FastAPI
+import hackathon_backend.interface as interface
+from hackathon_backend.competition import CompetitionRegistry
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+def registry(tmp_path, monkeypatch):
+    registry = CompetitionRegistry(tmp_path)
+    monkeypatch.setattr(interface, "registry", registry)
+    yield registry
+    registry.shutdown()
+
+
+@pytest.mark.anyio
+async def test_competitions_are_separated(registry, tmp_path):
+    # GIVEN
+    app = FastAPI()
+    app.include_router(interface.competition_router)
+    registry.create("league1", "tests/config.json")
+    registry.create("league2", "tests/config.json")
+
+    # WHEN
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        register = await ac.post(
+            "/competitions/league1/hackathon/register",
+            params={"participant_id": "TestA"},
+        )
+        actor_id = register.json()["actor_id"]
+        own_units = await ac.get(
+            "/competitions/league1/units/information", params={"actor_id": actor_id}
+        )
+        other_units = await ac.get(
+            "/competitions/league2/units/information", params={"actor_id": actor_id}
+        )
+        unknown = await ac.get("/competitions/league3/market/auction/open")
+        competitions = await ac.get("/competitions")
+
+    # THEN
+    assert register.status_code == 200
+    assert own_units.status_code == 200
+    assert other_units.status_code == 404
+    assert unknown.status_code == 404
+    assert competitions.json() == {"competitions": ["league1", "league2"]}
+    assert registry.get("league2").controller.registered == set()
+    assert registry.get("league1").controller.market.archive.fp.parent == (
+        tmp_path / "league1"
+    )
+
+
+@pytest.mark.anyio
+async def test_registry_rejects_invalid_ids(registry):
+    # GIVEN
+    registry.create("league1", "tests/config.json")
+
+    # WHEN / THEN
+    with pytest.raises(ValueError):
+        registry.create("league1", "tests/config.json")
+    with pytest.raises(ValueError):
+        registry.create("../league", "tests/config.json")
+
+
+@pytest.mark.anyio
+async def test_create_competition_from_config_only(registry, monkeypatch):
+    # GIVEN
+    app = FastAPI()
+    app.include_router(interface.competition_router)
+    config = interface.controller.config.model_copy(
+        update={"competitions": {"league1": "tests/config.json"}}
+    )
+    monkeypatch.setattr(interface.controller, "config", config)
+    remote = ASGITransport(app=app, client=("203.0.113.1", 123))
+
+    # WHEN
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        unknown = await ac.post(
+            "/competitions",
+            params={"competition_id": "league2", "config_file": "/etc/passwd"},
+        )
+        created = await ac.post("/competitions", params={"competition_id": "league1"})
+    async with AsyncClient(transport=remote, base_url="http://test") as ac:
+        not_local = await ac.post("/competitions", params={"competition_id": "league1"})
+
+    # THEN
+    assert unknown.status_code == 404
+    assert created.status_code == 200
+    assert not_local.status_code == 403
+    assert registry.ids() == ["league1"]
+
+
+@pytest.mark.anyio
+async def test_admin_token(registry, monkeypatch):
+    # GIVEN
+    app = FastAPI()
+    app.include_router(interface.competition_router)
+    config = interface.controller.config.model_copy(
+        update={"competitions": {"league1": "tests/config.json"}, "admin_token": "s3"}
+    )
+    monkeypatch.setattr(interface.controller, "config", config)
+
+    # WHEN
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        without_token = await ac.post(
+            "/competitions", params={"competition_id": "league1"}
+        )
+        with_token = await ac.post(
+            "/competitions",
+            params={"competition_id": "league1"},
+            headers={"X-Admin-Token": "s3"},
+        )
+
+    # THEN
+    assert without_token.status_code == 403
+    assert with_token.status_code == 200
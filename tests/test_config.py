@@ -0,0 +1,89 @@
+import asyncio
+import os
+import shutil
+import pytest
+from hackathon_backend.config import ConfigProvider, load_config
+from hackathon_backend.controller import Controller
+from hackathon_backend.persistence import JsonPersistenceHandler
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+def test_config_provider_reloads_only_on_file_change(tmp_path):
+    # GIVEN
+    config_file = tmp_path / "config.json"
+    shutil.copy("tests/config.json", config_file)
+    provider = ConfigProvider(config_file)
+    notified = []
+    provider.subscribe(notified.append)
+    config = provider.get()
+
+    # WHEN
+    refreshed = provider.refresh()
+
+    # THEN
+    assert refreshed is config
+    assert notified == []
+
+    # WHEN
+    changed = config.model_copy(update={"pause": not config.pause})
+    config_file.write_text(changed.model_dump_json(indent=4))
+    stat = os.stat(config_file)
+    os.utime(config_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    refreshed = provider.refresh()
+
+    # THEN
+    assert refreshed.pause == changed.pause
+    assert notified == [refreshed]
+
+
+def test_config_provider_push():
+    # GIVEN
+    provider = ConfigProvider("tests/config.json")
+    notified = []
+    provider.subscribe(notified.append)
+    pushed = provider.get().model_copy(update={"max_steps": 3})
+
+    # WHEN
+    provider.push(pushed)
+    provider.refresh()
+
+    # THEN
+    assert provider.get() is pushed
+    assert notified == [pushed]
+
+
+@pytest.mark.anyio
+async def test_paused_loop_wakes_on_pushed_config():
+    # GIVEN
+    controller = Controller("tests/config.json")
+    waiting = asyncio.ensure_future(controller._wait_for_config_change())
+    await asyncio.sleep(0)
+
+    # WHEN
+    controller.update_config(controller.config.model_copy(update={"pause": True}))
+
+    # THEN
+    await asyncio.wait_for(waiting, 1)
+    assert controller.config.pause
+
+
+@pytest.mark.anyio
+async def test_load_keeps_config_file(tmp_path):
+    # GIVEN
+    controller = Controller("tests/config.json")
+    controller.update_config(controller.config.model_copy(update={"max_steps": 3}))
+    handler = JsonPersistenceHandler(
+        tmp_path / "state.json",
+        controller_factory=lambda: Controller("tests/config.json"),
+    )
+    handler.write(controller)
+
+    # WHEN
+    loaded = handler.load()
+
+    # THEN
+    assert loaded.config == load_config("tests/config.json")
@@ -0,0 +1,32 @@
+import pytest
+from hackathon_backend.clock import FastForwardClock
+from hackathon_backend.controller import Controller
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.mark.anyio
+async def test_fast_forward_calls_agents_between_steps():
+    # GIVEN
+    controller = Controller("tests/config.json", step_clock=FastForwardClock())
+    placed = []
+
+    async def agent(controller, actor_id, current_time):
+        for auction in controller.market.get_open_auctions():
+            supply_time = auction["params"]["supply_start_time"]
+            await controller.receive_order([actor_id], [1], 10, supply_time)
+            placed.append((current_time, supply_time))
+
+    # WHEN
+    report = await controller.fast_forward(8, {"TestA": agent})
+
+    # THEN
+    assert report.steps == 8
+    assert controller.step == 8
+    assert controller.remaining_sleep == 0
+    assert placed[0] == (0, 4500)
+    assert len(controller.actor_accounts) == 1
+    assert len(controller.market.price_history) > 0
@@ -10,7 +10,12 @@ import pytest
 from hackathon_backend.main import lifespan
 from hackathon_backend.config import load_config
 import hackathon_backend.interface as interface
+from hackathon_backend.controller import Controller
+from hackathon_backend.persistence import JsonPersistenceHandler
+from hackathon_backend.market.auction import initiate_electricity_ask_auction
 import asyncio
+import struct
+import dataclasses
 
 
 @pytest.fixture
@@ -208,3 +213,267 @@ async def test_full_persistence(setup_controller):
     # THEN PERSISTENCE
     controller = interface.persistence_handler.load()
     assert controller is not None
+
+
+@pytest.mark.anyio
+async def test_read_price_history(setup_controller):
+    # GIVEN
+    app = setup_controller
+    market = interface.controller.market
+    market.price_history.extend([1.0, float("nan"), 3.0])
+
+    # WHEN
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        response = await ac.get(
+            "/market/auction/price_history", params={"offset": 1}
+        )
+        binary_response = await ac.get(
+            "/market/auction/price_history",
+            params={"offset": 2, "binary": True},
+        )
+
+    # THEN
+    assert response.status_code == 200
+    assert response.json() == {"price_history": [None, 3.0], "next_offset": 3}
+    assert binary_response.status_code == 200
+    assert binary_response.content == struct.pack("<d", 3.0)
+    assert binary_response.headers["X-Next-Offset"] == "3"
+
+
+@pytest.mark.anyio
+async def test_read_auctions_cached_per_step(setup_controller):
+    # GIVEN
+    app = setup_controller
+    market = interface.controller.market
+    market.receive_auction(initiate_electricity_ask_auction(0))
+    market.inputs._now_dt = 0
+    market.step()
+    interface.controller.publish_market_snapshot()
+
+    # WHEN
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        response = await ac.get("/market/auction/open")
+        cached = interface.controller.response_cache.get(
+            "open_auctions", interface.controller.snapshot.version, lambda: None
+        )
+
+    # THEN
+    assert response.status_code == 200
+    assert len(response.json()["auctions"]) == 1
+    assert response.content == cached
+
+    # WHEN
+    market.inputs._now_dt = 3600
+    market.step()
+    interface.controller.publish_market_snapshot()
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        response = await ac.get("/market/auction/open")
+
+    # THEN
+    assert response.json()["auctions"] == []
+
+
+@pytest.mark.anyio
+async def test_place_orders_batch(setup_controller):
+    # GIVEN
+    app = setup_controller
+    auction = initiate_electricity_ask_auction(0)
+    interface.controller.market.receive_auction(auction)
+    supply_time = auction.params.supply_start_time
+    order = {"actor_ids": ["A"], "amount_kw": [1], "price_ct": 1}
+
+    # WHEN
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        response = await ac.post(
+            "/market/auction/orders/batch",
+            json=[
+                {**order, "supply_time": supply_time},
+                {**order, "supply_time": supply_time, "price_ct": 3},
+                {**order, "supply_time": 1},
+            ],
+        )
+
+    # THEN
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [result["order_ok"] for result in results] == [True, True, False]
+    assert results[2]["detail"] == "The specified auction does not exist!"
+    assert len(auction.order_container) == 2
+
+
+@pytest.mark.anyio
+async def test_cancel_and_amend_order(setup_controller):
+    # GIVEN
+    app = setup_controller
+    auction = initiate_electricity_ask_auction(0)
+    interface.controller.market.receive_auction(auction)
+    supply_time = auction.params.supply_start_time
+
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        response = await ac.post(
+            "/market/auction/order",
+            params={
+                "actor_id": "A",
+                "amount_kw": 2,
+                "price_ct": 10,
+                "supply_time": supply_time,
+            },
+        )
+        order_id = response.json()["order_id"]
+
+        # WHEN
+        amend_response = await ac.post(
+            "/market/auction/order/amend",
+            params={"actor_id": "A", "order_id": order_id, "price_ct": 5},
+        )
+        foreign_response = await ac.post(
+            "/market/auction/order/cancel",
+            params={"actor_id": "B", "order_id": order_id},
+        )
+        cancel_response = await ac.post(
+            "/market/auction/order/cancel",
+            params={"actor_id": "A", "order_id": order_id},
+        )
+        missing_response = await ac.post(
+            "/market/auction/order/cancel",
+            params={"actor_id": "A", "order_id": order_id},
+        )
+
+    # THEN
+    assert response.status_code == 200
+    assert amend_response.json() == {"amend_ok": True}
+    assert foreign_response.status_code == 403
+    assert cancel_response.json() == {"cancel_ok": True}
+    assert missing_response.status_code == 404
+    assert len(auction.order_container) == 0
+
+
+@pytest.mark.anyio
+async def test_read_rate_limit(setup_controller, monkeypatch):
+    # GIVEN
+    app = setup_controller
+    interface.rate_limiter.reset()
+    interface.controller.config.read_rate_limit_per_s = 0.001
+    interface.controller.config.read_rate_limit_burst = 2
+    monkeypatch.setattr(
+        interface.controller.unit_pool, "has_actor", lambda aid: aid in ("a", "b")
+    )
+    # WHEN
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        responses = [
+            await ac.get("/market/auction/open", params={"actor_id": "a"})
+            for _ in range(3)
+        ]
+        other = await ac.get("/market/auction/open", params={"actor_id": "b"})
+        counters = (await ac.get("/admin/rate_limits")).json()
+    # THEN
+    assert [r.status_code for r in responses] == [200, 200, 429]
+    assert other.status_code == 200
+    assert counters["read"]["a"] == {"admitted": 2, "rejected": 1}
+    interface.rate_limiter.reset()
+
+
+@pytest.mark.anyio
+async def test_spoofed_actor_ids_share_rate_limit(setup_controller):
+    # GIVEN
+    app = setup_controller
+    interface.rate_limiter.reset()
+    interface.controller.config.order_rate_limit_per_s = 0.001
+    interface.controller.config.order_rate_limit_burst = 2
+    # WHEN
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        orders = [
+            await ac.post(
+                "/market/auction/order",
+                params={
+                    "actor_id": f"x{i}",
+                    "amount_kw": 1,
+                    "price_ct": 10,
+                    "supply_time": 0,
+                },
+            )
+            for i in range(2)
+        ]
+        group_order = await ac.post(
+            "/market/auction/grouporder",
+            params={"price_ct": 10, "supply_time": 0},
+            json={"actor_ids": ["x2"], "amount_kw": [1]},
+        )
+        counters = (await ac.get("/admin/rate_limits")).json()
+    # THEN
+    assert 429 not in [r.status_code for r in orders]
+    assert group_order.status_code == 429
+    assert list(counters["order"].values()) == [{"admitted": 2, "rejected": 1}]
+    interface.rate_limiter.reset()
+
+
+@pytest.mark.anyio
+async def test_register_rate_limit(setup_controller):
+    # GIVEN
+    app = setup_controller
+    interface.rate_limiter.reset()
+    interface.controller.config.order_rate_limit_per_s = 0.001
+    interface.controller.config.order_rate_limit_burst = 2
+    # WHEN
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        responses = [
+            await ac.post("/hackathon/register", params={"participant_id": f"p{i}"})
+            for i in range(3)
+        ]
+    # THEN
+    assert [r.status_code for r in responses] == [403, 403, 429]
+    interface.rate_limiter.reset()
+
+
+@pytest.mark.anyio
+async def test_reads_do_not_wait_for_running_step(setup_controller):
+    # GIVEN
+    app = setup_controller
+    market = interface.controller.market
+    market.receive_auction(initiate_electricity_ask_auction(0))
+    market.inputs._now_dt = 0
+    market.step()
+    interface.controller.publish_market_snapshot()
+    snapshot = interface.controller.snapshot
+    running_step = asyncio.get_running_loop().create_future()
+    interface.controller.current_market_task = running_step
+
+    # WHEN
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        response = await asyncio.wait_for(ac.get("/market/auction/open"), 1)
+
+    # THEN
+    assert response.status_code == 200
+    assert len(response.json()["auctions"]) == 1
+    assert interface.controller.snapshot is snapshot
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        snapshot.version = 0
+    running_step.set_result(None)
+
+
+@pytest.mark.anyio
+async def test_admin_load_shuts_down_replaced_controller(tmp_path, monkeypatch):
+    # GIVEN
+    app = FastAPI()
+    app.include_router(interface.router)
+    replaced = Controller("tests/config.json")
+    handler = JsonPersistenceHandler(
+        tmp_path / "state.json",
+        controller_factory=lambda: Controller("tests/config.json"),
+    )
+    handler.write(replaced)
+    replaced.init()
+    monkeypatch.setattr(interface, "controller", replaced)
+    monkeypatch.setattr(interface, "persistence_handler", handler)
+
+    # WHEN
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        response = await ac.post("/admin/load")
+    await asyncio.sleep(0)
+
+    # THEN
+    assert response.status_code == 200
+    assert interface.controller is not replaced
+    assert not replaced.running
+    assert interface.controller.running
+    interface.controller.shutdown()
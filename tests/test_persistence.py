@@ -0,0 +1,44 @@
+import pytest
+from hackathon_backend.controller import Controller
+from hackathon_backend.market.auction import initiate_electricity_ask_auction
+from hackathon_backend.persistence import ControllerRefs, JsonPersistenceHandler
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.mark.anyio
+async def test_snapshot_is_converted_when_written(tmp_path):
+    # GIVEN
+    controller = Controller("tests/config.json")
+    actor_id, _ = await controller.register_actor("TestA")
+    controller.market.receive_auction(initiate_electricity_ask_auction(0))
+    controller.market.inputs._now_dt = 0
+    controller.market.step()
+    [auction] = controller.market.open_auctions
+    order_id = await controller.receive_order(
+        [actor_id], [5], 10, auction.params.supply_start_time
+    )
+    handler = JsonPersistenceHandler(
+        tmp_path / "state.json",
+        controller_factory=lambda: Controller("tests/config.json"),
+    )
+
+    # WHEN
+    refs = handler.snapshot(controller)
+    controller.step = 7
+    controller.market.amend_order(order_id, actor_id, amount_kw=[1], price_ct=20)
+    handler.write_snapshot(refs)
+    loaded = handler.load()
+
+    # THEN
+    assert isinstance(refs, ControllerRefs)
+    assert loaded.step == 0
+    assert loaded.unit_pool.actors() == [actor_id]
+    [auction] = loaded.market.auctions.values()
+    assert [
+        (order.amount_kw, order.price_ct) for order in auction.order_container
+    ] == [([5], 10)]
+    controller.shutdown()
@@ -0,0 +1,54 @@
+import asyncio
+import threading
+import pytest
+from hackathon_backend.pipeline import HookWorker
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.mark.anyio
+async def test_hook_worker_writes_snapshots_in_thread():
+    # GIVEN
+    state = {"step": 0}
+    written = []
+    main_thread = threading.get_ident()
+
+    def write(snapshot):
+        written.append((snapshot, threading.get_ident() != main_thread))
+
+    worker = HookWorker(write, snapshot=lambda state: dict(state))
+
+    # WHEN
+    for step in range(3):
+        state["step"] = step
+        await worker.submit(state)
+    await worker.join()
+    worker.stop()
+
+    # THEN
+    assert written == [({"step": step}, True) for step in range(3)]
+
+
+@pytest.mark.anyio
+async def test_hook_worker_backpressure():
+    # GIVEN
+    release = threading.Event()
+    worker = HookWorker(lambda snapshot: release.wait(), snapshot=lambda s: s)
+    await worker.submit(0)
+    # wait until the first snapshot is taken by the hook
+    await asyncio.sleep(0.05)
+    await worker.submit(1)
+
+    # WHEN
+    blocked = asyncio.ensure_future(worker.submit(2))
+    await asyncio.sleep(0.05)
+
+    # THEN
+    assert not blocked.done()
+    release.set()
+    await blocked
+    await worker.join()
+    worker.stop()
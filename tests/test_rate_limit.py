@@ -0,0 +1,38 @@
+from hackathon_backend.rate_limit import RateLimiter
+
+
+def test_rate_limiter_refills_per_key():
+    # GIVEN
+    now = [0.0]
+    limiter = RateLimiter(clock=lambda: now[0])
+
+    # WHEN
+    admitted = [limiter.allow("order", "a", 1, 2) for _ in range(3)]
+
+    # THEN
+    assert admitted == [True, True, False]
+    assert limiter.allow("order", "b", 1, 2)
+    assert limiter.allow("read", "a", 1, 2)
+
+    # WHEN
+    now[0] = 1.5
+
+    # THEN
+    assert limiter.allow("order", "a", 1, 2)
+    assert not limiter.allow("order", "a", 1, 2)
+    assert limiter.get_counters()["order"]["a"] == {"admitted": 3, "rejected": 2}
+
+
+def test_rate_limiter_evicts_least_recently_used_bucket():
+    # GIVEN
+    limiter = RateLimiter(clock=lambda: 0.0, max_buckets=2)
+    limiter.allow("order", "a", 1, 1)
+    limiter.allow("order", "b", 1, 1)
+
+    # WHEN
+    limiter.allow("order", "a", 1, 1)
+    limiter.allow("order", "c", 1, 1)
+
+    # THEN
+    assert set(limiter.get_counters()["order"]) == {"a", "c"}
+    assert limiter.get_counters()["order"]["a"] == {"admitted": 1, "rejected": 1}
@@ -0,0 +1,55 @@
+import pytest
+from hackathon_backend.controller import Controller
+from hackathon_backend.snapshot import LazyMapping
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+def test_lazy_mapping_loads_on_first_access():
+    # GIVEN
+    loads = []
+
+    def load(key):
+        loads.append(key)
+        return key * 2
+
+    mapping = LazyMapping(["a", "b", "c"], load, values={"c": "x"})
+
+    # WHEN
+    values = [mapping["a"], mapping["a"], mapping["c"]]
+
+    # THEN
+    assert values == ["aa", "aa", "x"]
+    assert loads == ["a"]
+    assert "b" in mapping and not mapping.is_loaded("b")
+    assert list(mapping) == ["a", "b", "c"]
+    with pytest.raises(KeyError):
+        mapping["d"]
+
+
+@pytest.mark.anyio
+async def test_unit_information_is_read_on_first_access(monkeypatch):
+    # GIVEN
+    controller = Controller("tests/config.json")
+    actor_id, registered_information = await controller.register_actor("TestA")
+    reads = []
+    read_all_units = controller.unit_pool.read_all_units
+
+    def counting_read_all_units(actors=None):
+        reads.append(actors)
+        return read_all_units(actors)
+
+    monkeypatch.setattr(controller.unit_pool, "read_all_units", counting_read_all_units)
+
+    # WHEN
+    controller.publish_unit_snapshot()
+
+    # THEN
+    assert reads == []
+    assert await controller.read_units(actor_id) == registered_information
+    assert await controller.read_units(actor_id) == registered_information
+    assert reads == [[actor_id]]
+    controller.shutdown()
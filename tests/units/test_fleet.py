@@ -0,0 +1,77 @@
+import pickle
+import random
+from pysimmods.buffer.batterysim.battery import Battery
+from hackathon_backend.units.fleet import BatteryFleet
+from hackathon_backend.units.battery import MidasBatteryUnit, create_battery
+from hackathon_backend.units.unit import UnitInput
+
+
+def _create_batteries(rng, n_batteries):
+    params = []
+    for _ in range(n_batteries):
+        params.append(
+            {
+                "cap_kwh": rng.uniform(1, 20),
+                "p_charge_max_kw": rng.uniform(0, 5),
+                "p_discharge_max_kw": rng.uniform(0, 5),
+                "soc_min_percent": rng.choice([0, 10]),
+                "eta_pc": rng.choice([[0, 0, 100], [-2.109566, 0.403556, 97.110770]]),
+            }
+        )
+    return params
+
+
+def test_fleet_matches_pysimmods_battery():
+    # GIVEN
+    rng = random.Random(42)
+    params = _create_batteries(rng, 50)
+    midas_batteries = [Battery(p, {"soc_percent": 50}) for p in params]
+    fleet = BatteryFleet(capacity=4)
+    scalar_fleet = BatteryFleet(capacity=4)
+    indices = [fleet.add(soc_percent=50, **p) for p in params]
+    for p in params:
+        scalar_fleet.add(soc_percent=50, **p)
+
+    for _ in range(100):
+        setpoints = [rng.uniform(-6, 6) for _ in params]
+        # WHEN
+        p_kw = fleet.step(indices, setpoints, 15 * 60)
+        scalar_p_kw = [
+            scalar_fleet.step_battery(index, setpoint, 15 * 60)
+            for index, setpoint in zip(indices, setpoints)
+        ]
+        expected_p_kw = []
+        for battery, setpoint in zip(midas_batteries, setpoints):
+            battery.set_p_kw(setpoint)
+            battery.set_step_size(15 * 60)
+            battery.step()
+            expected_p_kw.append(battery.get_p_kw())
+
+        # THEN
+        expected_soc = [battery.state.soc_percent for battery in midas_batteries]
+        assert p_kw.tolist() == expected_p_kw
+        assert scalar_p_kw == expected_p_kw
+        assert fleet.soc_percent[indices].tolist() == expected_soc
+        assert scalar_fleet.soc_percent[indices].tolist() == expected_soc
+
+
+def test_battery_unit_is_view_into_fleet():
+    # GIVEN
+    fleet = BatteryFleet()
+    battery = MidasBatteryUnit(create_battery("b0").read_information(), fleet=fleet)
+    other_battery = MidasBatteryUnit(
+        create_battery("b1", initial_soc=20).read_information(), fleet=fleet
+    )
+
+    # WHEN
+    result = battery.step(UnitInput(15 * 60, p_kw=2, q_kvar=0), 0)
+    fleet.step([battery.index, other_battery.index], [-2, 2], 15 * 60)
+    copied_battery = pickle.loads(pickle.dumps(battery))
+
+    # THEN
+    assert result.p_kw == 2
+    assert len(fleet) == 2
+    assert battery.soc_percent == 50
+    assert other_battery.read_information().soc_percent == 20 + 0.5 * 100 / 12
+    assert copied_battery.fleet is not fleet
+    assert copied_battery.read_information() == battery.read_information()
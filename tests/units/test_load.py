@@ -68,4 +68,25 @@ def test_get_forecast2():
 
     # THEN
     assert type(result.forecast_demand_p_kw) == list
-    assert len(result.forecast_demand_p_kw) == 9
\ No newline at end of file
+    assert len(result.forecast_demand_p_kw) == 9
+
+
+def test_forecast_is_read_only_view_of_shared_profile():
+    # GIVEN
+    demand_unit = create_demand("d0", list(range(96)), [1] * 96, 1)
+    other_demand_unit = create_demand("d1", list(range(96)), [1] * 96, 1)
+
+    # WHEN
+    p_forecast, q_forecast = demand_unit.get_forecast(90, 99)
+    information = demand_unit.read_information()
+
+    # THEN
+    assert p_forecast.tolist() == [90, 91, 92, 93, 94, 95]
+    assert q_forecast.tolist() == [1] * 6
+    assert p_forecast.base is demand_unit._simple_demand._perfect_demand_p_kw
+    assert not p_forecast.flags.writeable
+    assert (
+        other_demand_unit._simple_demand._perfect_demand_p_kw
+        is demand_unit._simple_demand._perfect_demand_p_kw
+    )
+    assert information.forecast_demand_p_kw == list(range(9))
@@ -1,4 +1,6 @@
+import pytest
 from hackathon_backend.units.pool import *
+from hackathon_backend.units.battery import BatteryInformation
 
 
 def test_pool_with_default_actors_neg_input():
@@ -27,3 +29,84 @@ def test_pool_with_default_actors():
 
     # THEN
     assert output.p_kw == -34.09720438561578
+
+
+def _battery_socs(vpp_information):
+    return [
+        information.soc_percent
+        for information in vpp_information.unit_information_list
+        if isinstance(information, BatteryInformation)
+    ]
+
+
+def test_pool_with_workers_matches_in_process_stepping():
+    # GIVEN
+    from hackathon_backend.units.workers import UnitWorkers
+
+    pool = UnitPool()
+    worker_pool = UnitPool()
+    inputs = {}
+    for i in range(5):
+        uuid, root_node = allocate_default_actor_units()
+        pool.insert_actor_root(uuid, root_node)
+        _, worker_root_node = allocate_default_actor_units()
+        worker_pool.insert_actor_root(uuid, worker_root_node)
+        inputs[uuid] = UnitInput(delta_t=15 * 60, p_kw=i, q_kvar=0)
+    worker_pool.attach_workers(UnitWorkers(2))
+
+    try:
+        # WHEN
+        for step in range(30, 33):
+            expected = pool.step_actors(inputs, step)
+            output = worker_pool.step_actors(inputs, step)
+
+            # THEN
+            assert list(output.keys()) == list(inputs.keys())
+            assert output == expected
+        full_information = worker_pool.read_full_information()
+        for uuid in inputs.keys():
+            assert _battery_socs(full_information[uuid]) == _battery_socs(
+                pool.read_full_information([uuid])[uuid]
+            )
+        for uuid in inputs.keys():
+            battery = pool.actor_to_root[uuid].sub_units["b0"]
+            worker_battery = worker_pool.actor_to_root[uuid].sub_units["b0"]
+            assert worker_battery.soc_percent == battery.soc_percent
+    finally:
+        worker_pool.detach_workers()
+
+
+def test_pool_with_workers_recovers_from_worker_error():
+    # GIVEN
+    from hackathon_backend.units.workers import UnitWorkers
+
+    pool = UnitPool()
+    worker_pool = UnitPool()
+    actor_ids = []
+    for _ in range(2):
+        uuid, root_node = allocate_default_actor_units()
+        pool.insert_actor_root(uuid, root_node)
+        _, worker_root_node = allocate_default_actor_units()
+        worker_pool.insert_actor_root(uuid, worker_root_node)
+        actor_ids.append(uuid)
+    worker_pool.attach_workers(UnitWorkers(2))
+    broken_input = UnitInput(delta_t=15 * 60, p_kw=None, q_kvar=0)
+    input = UnitInput(delta_t=15 * 60, p_kw=3, q_kvar=0)
+
+    try:
+        # WHEN
+        # only the worker of the first actor fails
+        with pytest.raises(TypeError):
+            worker_pool.step_actors(
+                {actor_ids[0]: broken_input, actor_ids[1]: input}, 30
+            )
+        with pytest.raises(TypeError):
+            pool.step_actors({actor_ids[0]: broken_input}, 30)
+        pool.step_actors({actor_ids[1]: input}, 30)
+        inputs = {actor_id: input for actor_id in actor_ids}
+        output = worker_pool.step_actors(inputs, 31)
+
+        # THEN
+        assert output == pool.step_actors(inputs, 31)
+    finally:
+        worker_pool.detach_workers()
@@ -1,3 +1,4 @@
+import math
 from hackathon_backend.units.pv import *
 
 
@@ -59,4 +60,71 @@ def test_check_pv_forecast():
     # assert 0 == 1
     
     assert type(result.forecast_pv_p_kw) == list
-    assert len(result.forecast_pv_p_kw) == 9
\ No newline at end of file
+    assert len(result.forecast_pv_p_kw) == 9
+
+
+def test_precomputed_profile_matches_pysimmods():
+    # GIVEN
+    n_intervals = 96
+    cos_values = [math.cos(2 * math.pi * x / n_intervals) for x in range(n_intervals)]
+    information = PVInformation(
+        unit_id="pv1",
+        pv_p_kw=[1000 * (1 - s) / 2 for s in cos_values],
+        a_m2=11,
+        eta_percent=23,
+        t_module_deg_celsius=9,
+        forecast_seed=1,
+    )
+    precomputed_unit = MidasPVUnit(information)
+    midas_unit = MidasPVUnit(information, precompute_profile=False)
+
+    for step in range(n_intervals):
+        # WHEN
+        precomputed_result = precomputed_unit.step(UnitInput(15 * 60, 1, 1), step)
+        midas_result = midas_unit.step(UnitInput(15 * 60, 1, 1), step)
+        precomputed_forecast = precomputed_unit.read_information()
+        midas_forecast = midas_unit.read_information()
+
+        # THEN
+        assert precomputed_result == midas_result
+        assert precomputed_forecast == midas_forecast
+
+
+def test_precomputed_unit_runs_model_for_other_step_sizes():
+    # GIVEN
+    information = create_pv_unit("pv1").read_full_information()
+    precomputed_unit = MidasPVUnit(information)
+    midas_unit = MidasPVUnit(information, precompute_profile=False)
+
+    # WHEN
+    precomputed_result = precomputed_unit.step(UnitInput(5 * 60, 1, 1), 35)
+    midas_result = midas_unit.step(UnitInput(5 * 60, 1, 1), 35)
+    precomputed_forecast = precomputed_unit.get_forecast(35, 44, step_size=5 * 60)
+    midas_forecast = midas_unit.get_forecast(35, 44, step_size=5 * 60)
+
+    # THEN
+    assert precomputed_unit._midas_pp.get_p_kw() == midas_result.p_kw
+    assert precomputed_result == midas_result
+    assert precomputed_forecast == midas_forecast
+
+
+def test_pv_forecast_is_fixed_per_step():
+    # GIVEN
+    pv_unit = MidasPVUnit(
+        create_pv_unit("pv1").read_full_information(), precompute_profile=False
+    )
+    pv_unit.step(UnitInput(15 * 60, 1, 1), 35, None)
+    midas_state = pv_unit._midas_pp.get_state()
+
+    # WHEN
+    first_forecast = pv_unit.get_forecast(35, 44)
+    pv_unit.get_forecast(60, 69)
+    second_forecast = pv_unit.get_forecast(35, 44)
+    information = pv_unit.read_information()
+
+    # THEN
+    assert first_forecast == second_forecast
+    assert information.forecast_pv_p_kw == first_forecast
+    assert pv_unit.read_information() is information
+    assert pv_unit._midas_pp.get_state() == midas_state
+    assert pv_unit.read_full_information().forecast_seed is not None
@@ -19,7 +19,7 @@ def test_vpp_battery_adjust_strategy_battery_cant_adjust():
 
     # THEN
     assert result.p_kw == 4.9027956143842175
-    assert battery._midas_battery.state.soc_percent == 45
+    assert battery.soc_percent == 45
 
 
 def test_vpp_battery_adjust_strategy_battery_can_adjust():
@@ -39,4 +39,79 @@ def test_vpp_battery_adjust_strategy_battery_can_adjust():
 
     # THEN
     assert result.p_kw == 0
-    assert battery._midas_battery.state.soc_percent == 49.524301096403946
+    assert battery.soc_percent == 49.524301096403946
+
+
+def test_vpp_plan_compiled_once_until_units_change():
+    # GIVEN
+    vpp = VPP(BatteryAdjustVPPStrategy())
+    vpp.add_unit(create_demand("d0", [5] * 96, [5] * 96, 1))
+    vpp.add_unit(create_pv_unit("pb0"))
+    vpp.add_unit(create_battery("b0"))
+
+    # WHEN
+    vpp.step(UnitInput(15 * 60, 1, 1), 30)
+    plan = vpp.plan
+    vpp.step(UnitInput(15 * 60, 1, 1), 31)
+
+    # THEN
+    assert vpp.plan is plan
+    assert [unit.id for _, unit in plan.generators] == ["pb0"]
+    assert [unit.id for _, unit in plan.loads] == ["d0"]
+    assert [unit.id for unit in plan.storage] == ["b0"]
+
+    # WHEN
+    vpp.add_unit(create_battery("b1"))
+
+    # THEN
+    assert vpp.plan is not plan
+    assert [unit.id for unit in vpp.plan.storage] == ["b0", "b1"]
+
+
+def test_step_units_matches_stepping_one_after_another():
+    # GIVEN
+    def create_vpp(initial_soc):
+        vpp = VPP(BatteryAdjustVPPStrategy())
+        vpp.add_unit(create_demand("d0", list(range(96)), [1] * 96, 1))
+        vpp.add_unit(create_pv_unit("pb0"))
+        vpp.add_unit(create_battery("b0", initial_soc=initial_soc))
+        vpp.add_unit(create_battery("b1", initial_soc=100 - initial_soc))
+        return vpp
+
+    vpps = [create_vpp(soc) for soc in range(0, 100, 10)]
+    expected_vpps = [create_vpp(soc) for soc in range(0, 100, 10)]
+    inputs = [UnitInput(15 * 60, p_kw, 1) for p_kw in range(-50, 50, 10)]
+
+    for step in range(30, 40):
+        # WHEN
+        results = step_units(vpps, inputs, step)
+
+        # THEN
+        assert results == [
+            vpp.step(input, step) for vpp, input in zip(expected_vpps, inputs)
+        ]
+    assert [vpp.sub_units["b1"].soc_percent for vpp in vpps] == [
+        vpp.sub_units["b1"].soc_percent for vpp in expected_vpps
+    ]
+
+
+def test_strategy_stepped_directly_compiles_plan_once():
+    # GIVEN
+    strategy = BatteryAdjustVPPStrategy()
+    units = [create_pv_unit("pb0"), create_battery("b0")]
+    compiled = []
+    compile = strategy.compile
+
+    def counting_compile(units):
+        compiled.append(units)
+        return compile(units)
+
+    strategy.compile = counting_compile
+
+    # WHEN
+    for step in range(30, 33):
+        strategy.step(UnitInput(15 * 60, 1, 0), {}, units, step)
+    strategy.step(UnitInput(15 * 60, 1, 0), {}, units[:1], 33)
+
+    # THEN
+    assert compiled == [units, units[:1]]